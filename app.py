@@ -1,14 +1,17 @@
 ''' IPL Analytics Dashboard '''
-import json
+import time
+
 import streamlit as st
-import pandas as pd
-from series_analysis import no_of_wins, pair_analysis, venue_run, tosschoice_bb
+from dataset import current
+from scorecards import innings_data
+from kpis import match_kpis
+from prerender import preload
+from series_analysis import figure
 from team_performance import (
     sunburst, match_count, overseas_players, performance, toss_performance, toss_choice
     )
-from match_analysis import (
-    dismissals, boundaries, batsman_perf, bowler_perf, fielder_perf
-)
+from match_analysis import archive_fielders, innings_views
+from match_index import match_index
 
 st.set_page_config(
     page_title = 'IPL Dashboard',
@@ -16,36 +19,41 @@ st.set_page_config(
     initial_sidebar_state = 'collapsed'
 )
 
+SECTIONS = ['Series Analysis', 'Team Performance Analysis', 'Match Analysis']
 
-st.title("IPL Analytics")
-
-tab1, tab2, tab3 = st.tabs(['Series Analysis', 'Team Performance Analysis', 'Match Analysis'])
-
-with tab1: #Series Analysis
-    match_list = pd.read_csv('data/match_list-9jun25.csv')
-    match_info = pd.read_csv('data/match_info-10jun25.csv')
 
+# Each section is a fragment: its widgets rerun only that section
+@st.fragment
+def series_section():
+    ''' Series Analysis '''
     col = st.columns([0.7, 0.3], gap='medium')
 
     with col[0]:
-        st.plotly_chart(venue_run, use_container_width=True)
+        st.plotly_chart(figure('venue_run'), use_container_width=True)
         # with col2[1]:
-        #     st.plotly_chart(tosschoice_venue, use_container_width=True)
+        #     st.plotly_chart(figure('tosschoice_venue'), use_container_width=True)
+
+        st.dataframe(figure('pair_analysis'))
 
-        st.dataframe(pair_analysis)
+        # Every catch of the archive: top catchers as one stacked trace, cached per dataset version
+        st.plotly_chart(archive_fielders(), use_container_width=True)
 
     with col[1]:
+        st.dataframe(figure('points_table'))
+
         with st.container().markdown("**Right Container 1**"):
-            st.plotly_chart(no_of_wins, use_container_width=True)
+            st.plotly_chart(figure('no_of_wins'), use_container_width=True)
 
         with st.container().markdown("**Right Container 2**"):
-            st.plotly_chart(tosschoice_bb, use_container_width=True)
+            st.plotly_chart(figure('tosschoice_bb'), use_container_width=True)
 
-with tab2: #Team Performance
-    match_list = pd.read_csv('data/match_list-9jun25.csv')
-    match_info = pd.read_csv('data/match_info-10jun25.csv')
 
-    team_names = match_info.Team1.str.replace(' ', '_').unique().tolist()
+@st.fragment
+def team_section():
+    ''' Team Performance '''
+    matches = current().table('matches')
+
+    team_names = matches.Team1.astype(str).str.replace(' ', '_').unique().tolist()
 
     team_name = st.selectbox(
         'Select a Team: ',
@@ -70,125 +78,100 @@ with tab2: #Team Performance
             st.plotly_chart(match_count(team_name), use_container_width=True)
             st.plotly_chart(toss_choice(team_name), use_container_width=True)
 
-with tab3: #Match Analysis
-    match_list = pd.read_csv('data/match_list-9jun25.csv')
 
-    selection = st.selectbox(
-        'Select a Match',
-        (match_list.MatchDate + ', ' + match_list.MatchName).to_list()
-    )
+def innings_panel(match, innings_no):
+    ''' Scorecard KPIs and charts of one innings '''
+    team, batting, bowling = innings_data(match, innings_no)
+    kpi = match_kpis(match, innings_no)
 
-    match_id = match_list.MatchID.loc[match_list.MatchName == selection.split(', ')[1]]
+    with st.container(border=True):
+        st.header(team, anchor=False)
+        inner_col = st.columns(4, gap='small')
+        with inner_col[0]:
+            st.metric('Total Runs', int(kpi['total_runs']), border=True)
+        with inner_col[1]:
+            st.metric('Total Balls Faced', int(kpi['total_balls']), border=True)
+        with inner_col[2]:
+            st.metric('Team Strike Rate', kpi['team_strike'], border=True)
+        with inner_col[3]:
+            st.metric('Total Dismissals', int(kpi['total_dismissals']), border=True)
 
-    @st.cache_data
-    def load_match_data(match):
-        ''' Read data for Match Data Files '''
-        with open(f'data/scorecard/{match}.json', 'r', encoding="utf-8") as f:
-            data = json.load(f)
+        views = innings_views(batting, bowling)
 
-        return data
+        inner_col2 = st.columns(2, gap='small')
+        with inner_col2[0]:
+            # Visualization: Dismissals
+            st.plotly_chart(views['dismissals'], key=f'dismissals_{innings_no}')
+        with inner_col2[1]:
+            # Visualization: Boundaries
+            st.plotly_chart(views['boundaries'], key=f'boundaries_{innings_no}')
 
-    # Data Ingestion
-    inn1 = load_match_data(match_id.values[0])[0]
-    inn2 = load_match_data(match_id.values[0])[1]
-    inn1_name = inn1['inning'].replace(' Inning 1', '')
-    inn2_name = inn2['inning'].replace(' Inning 1', '')
+        # Visualization: Batsman Performance
+        st.plotly_chart(views['batsman'], key=f'batsman_{innings_no}')
 
-    # Data Preprocessing
-    ## Match First Half
-    batting = pd.DataFrame.from_records(inn1['batting'])
-    batting.batsman = pd.json_normalize(batting.batsman)['name']
-    batting.bowler = pd.json_normalize(batting.bowler)['name']
-    batting.catcher = pd.json_normalize(batting.catcher)['name']
+        # Visualization: Bowler Performance
+        st.plotly_chart(views['bowler'], key=f'bowler_{innings_no}')
 
-    bowling = pd.DataFrame.from_records(inn1['bowling'])
-    bowling.bowler = pd.json_normalize(bowling.bowler)['name']
-    bowling['extras'] = bowling['nb'] + bowling['wd']
+        # Visualization: Fielder Performance
+        st.plotly_chart(views['fielder'], key=f'fielder_{innings_no}')
 
-    # KPIs
-    total_runs = batting['r'].sum()
-    total_balls = batting['b'].sum()
-    team_strike = round((total_runs / total_balls) * 100, 2)
-    total_dismissals = batting['dismissal'].notna().sum()
 
-    col = st.columns(2, gap='small')
-    # Dashoard
+@st.fragment
+def match_section():
+    ''' Match Analysis '''
+    index = match_index()
+    first, last = index.date_range()
+
+    col = st.columns(3, gap='small')
     with col[0]:
-        with st.container(border=True):
-            st.header(inn1_name, anchor=False)
-            inner_col = st.columns(4, gap='small')
-            with inner_col[0]:
-                st.metric('Total Runs', total_runs, border=True)
-            with inner_col[1]:
-                st.metric('Total Balls Faced', total_balls, border=True)
-            with inner_col[2]:
-                st.metric('Team Strike Rate', team_strike, border=True)
-            with inner_col[3]:
-                st.metric('Total Dismissals', total_dismissals, border=True)
-
-            inner_col2 = st.columns(2, gap='small')
-            with inner_col2[0]:
-                # Visualization: Dismissals
-                dismissial_counts = batting['dismissal'].value_counts()
-                st.plotly_chart(dismissals(dismissial_counts))
-            with inner_col2[1]:
-                # Visualization: Boundaries
-                boundaries_count = batting.groupby('batsman')[['4s', '6s']].sum().reset_index()
-                st.plotly_chart(boundaries(boundaries_count))
-
-            # Visualization: Batsman Performance
-            st.plotly_chart(batsman_perf(batting))
-
-            # Visualization: Bowler Performance
-            st.plotly_chart(bowler_perf(bowling))
-
-            # Visualization: Fielder Performance
-            st.plotly_chart(fielder_perf(batting))
-
-    ## Match Second Half
-    batting1 = pd.DataFrame.from_records(inn2['batting'])
-    batting1.batsman = pd.json_normalize(batting1.batsman)['name']
-    batting1.bowler = pd.json_normalize(batting1.bowler)['name']
-    batting1.catcher = pd.json_normalize(batting1.catcher)['name']
-
-    bowling1 = pd.DataFrame.from_records(inn2['bowling'])
-    bowling1.bowler = pd.json_normalize(bowling1.bowler)['name']
-    bowling1['extras'] = bowling1['nb'] + bowling1['wd']
-
-    total_runs = batting1['r'].sum()
-    total_balls = batting1['b'].sum()
-    team_strike = round((total_runs / total_balls) * 100, 2)
-    total_dismissals = batting1['dismissal'].notna().sum()
+        team = st.selectbox('Team', index.teams(), index=None, placeholder='All teams')
+    with col[1]:
+        venue = st.selectbox('Venue', index.venues(), index=None, placeholder='All venues')
+    with col[2]:
+        dates = st.date_input('Dates', (first, last), min_value=first, max_value=last)
+
+    # Options are MatchIDs, so repeat fixtures stay distinct and no label is parsed back
+    match_ids = index.filter(team, venue, *dates)
+    if not len(match_ids):
+        st.info('No matches for these filters.')
+        return
+
+    match = st.selectbox('Select a Match', match_ids, format_func=index.label)
+
+    if match_kpis(match, 1) is None or match_kpis(match, 2) is None:
+        st.warning('Scorecard is not available for both innings of this match.')
+        return
 
     # Dashoard
-    with col[1]:
-        with st.container(border=True):
-            st.header(inn2_name, anchor=False)
-            inner_col = st.columns(4, gap='small')
-            with inner_col[0]:
-                st.metric('Total Runs', total_runs, border=True)
-            with inner_col[1]:
-                st.metric('Total Balls Faced', total_balls, border=True)
-            with inner_col[2]:
-                st.metric('Team Strike Rate', team_strike, border=True)
-            with inner_col[3]:
-                st.metric('Total Dismissals', total_dismissals, border=True)
-
-            inner_col2 = st.columns(2, gap='small')
-            with inner_col2[0]:
-                # Visualization: Dismissals
-                dismissial_counts = batting1['dismissal'].value_counts()
-                st.plotly_chart(dismissals(dismissial_counts))
-            with inner_col2[1]:
-                # Visualization: Boundaries
-                boundaries_count = batting1.groupby('batsman')[['4s', '6s']].sum().reset_index()
-                st.plotly_chart(boundaries(boundaries_count))
-
-            # Visualization: Batsman Performance
-            st.plotly_chart(batsman_perf(batting1))
-
-            # Visualization: Bowler Performance
-            st.plotly_chart(bowler_perf(bowling1))
-
-            # Visualization: Fielder Performance
-            st.plotly_chart(fielder_perf(batting1))
+    col = st.columns(2, gap='small')
+    for innings_no, column in enumerate(col, start=1):
+        with column:
+            innings_panel(match, innings_no)
+
+
+st.title("IPL Analytics")
+
+# One read-only dataset per process; sessions only hold their widget state
+dataset = current()
+# Serve views pre-rendered by `python prerender.py` for this dataset, if any
+preload(versions=dataset.version)
+st.sidebar.caption(
+    f"Shared dataset: {dataset.footprint()['total'] / 2**20:.1f} MB, "
+    f"loaded {time.strftime('%H:%M:%S', time.localtime(dataset.loaded_at))}"
+)
+
+# Only the selected section is rendered on a rerun
+section = st.radio(
+    'Section',
+    SECTIONS,
+    horizontal=True,
+    key='section',
+    label_visibility='collapsed'
+)
+
+if section == 'Series Analysis':
+    series_section()
+elif section == 'Team Performance Analysis':
+    team_section()
+else:
+    match_section()
@@ -0,0 +1,351 @@
+''' Synthetic IPL Dataset Generator for Load Testing '''
+import argparse
+import datetime
+import json
+import math
+import os
+import shutil
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import format_tag, resolve  # pylint: disable=wrong-import-position
+
+SOURCE_DATA = os.path.join(ROOT, 'data')
+MATCHES_PER_SEASON = 74
+
+# Shapes taken from the shipped 2025 season
+DISMISSALS = {
+    'catch': 0.685, 'bowled': 0.152, 'lbw': 0.062, 'runout': 0.043,
+    'cb': 0.025, 'stumped': 0.021, 'hitwicket': 0.004, 'retired out': 0.004, 'injury': 0.004
+}
+BOWLER_CREDITED = {'catch', 'bowled', 'lbw', 'cb', 'stumped', 'hitwicket'}
+FIELDER_INVOLVED = {'catch': 'catch', 'stumped': 'stumped', 'runout': 'runout', 'cb': 'cb'}
+FIRST_INNINGS_RUNS = (190, 37)
+TOSS_BOWL_SHARE = 0.82
+HOME_VENUE_SHARE = 0.85
+ROLE_ORDER = ['Batsman', 'WK-Batsman', 'Batting Allrounder', 'Bowling Allrounder', 'Bowler']
+
+
+def new_id(rng):
+    ''' Deterministic UUID4 drawn from the generator '''
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+def to_overs(balls):
+    ''' Cricket notation for a ball count, e.g. 98 -> 16.2 '''
+    return balls // 6 + (balls % 6) / 10
+
+
+def load_reference():
+    ''' Teams, squads and venues of the shipped season '''
+    squads = {}
+    for name in sorted(os.listdir(os.path.join(SOURCE_DATA, 'squad'))):
+        team = os.path.splitext(name)[0]
+        squads[team.replace('_', ' ')] = pd.read_csv(os.path.join(SOURCE_DATA, 'squad', name))
+
+    source = resolve(SOURCE_DATA)
+    match_info = pd.read_csv(os.path.join(SOURCE_DATA, source.match_info))
+    match_list = pd.read_csv(os.path.join(SOURCE_DATA, source.match_list))
+    matches = pd.merge(match_info, match_list, left_on='id', right_on='MatchID')
+    home = matches.groupby('Team1').MatchVenue.agg(lambda v: v.value_counts().index[0])
+    venues = match_list.MatchVenue.value_counts(normalize=True)
+    return squads, home.to_dict(), venues
+
+
+def league_fixtures(teams, rng):
+    ''' Ordered team pairs of one league stage '''
+    order = list(rng.permutation(teams))
+    n = len(order)
+    pairs = []
+    if n == 10:
+        # IPL format: five opponents twice, four once -> 14 matches per team
+        twice = set()
+        for i in range(n):
+            for offset in (1, 2, 5):
+                twice.add(frozenset((order[i], order[(i + offset) % n])))
+        for i in range(n):
+            for j in range(i + 1, n):
+                a, b = order[i], order[j]
+                pairs.append((a, b))
+                if frozenset((a, b)) in twice:
+                    pairs.append((b, a))
+    else:
+        pairs = [(a, b) for a in order for b in order if a != b]
+    return [pairs[i] for i in rng.permutation(len(pairs))]
+
+
+class SeasonGenerator:
+    ''' Deterministic generator of fixtures, results and scorecards '''
+
+    def __init__(self, seed, squads, home, venues):
+        self.rng = np.random.default_rng(seed)
+        self.squads = squads
+        self.teams = sorted(squads)
+        self.home = home
+        self.venue_names = venues.index.to_numpy()
+        self.venue_weights = venues.to_numpy()
+
+    # Teams
+    def playing_xi(self, team):
+        ''' Eleven players of a squad in batting order '''
+        squad = self.squads[team]
+        picks = []
+        quotas = {'Batsman': 4, 'WK-Batsman': 1, 'Batting Allrounder': 1,
+                  'Bowling Allrounder': 1, 'Bowler': 4}
+        for role in ROLE_ORDER:
+            pool = squad[squad.role == role]
+            take = min(quotas[role], len(pool))
+            picks.extend(pool.iloc[self.rng.permutation(len(pool))[:take]].index)
+        rest = [i for i in squad.index if i not in picks]
+        picks.extend(self.rng.permutation(rest)[:11 - len(picks)])
+        xi = squad.loc[picks]
+        return xi.iloc[np.argsort([ROLE_ORDER.index(r) if r in ROLE_ORDER else 2
+                                   for r in xi.role], kind='stable')]
+
+    def venue(self, team1):
+        ''' Home ground most of the time, otherwise a weighted neutral venue '''
+        if team1 in self.home and self.rng.random() < HOME_VENUE_SHARE:
+            return self.home[team1]
+        return self.rng.choice(self.venue_names, p=self.venue_weights)
+
+    # Scores
+    def result(self, bat_first, bat_second, strength):
+        ''' First and second innings totals, wickets and balls '''
+        rng = self.rng
+        r1 = int(np.clip(rng.normal(*FIRST_INNINGS_RUNS), 90, 290))
+        w1 = int(np.clip(rng.binomial(10, 0.62), 1, 10))
+        b1 = 120 if w1 < 10 else int(rng.integers(96, 121))
+
+        edge = strength[bat_second] - strength[bat_first]
+        chased = rng.random() < 1 / (1 + math.exp(-edge))
+        if chased:
+            r2 = r1 + int(rng.integers(1, 7))
+            w2 = int(rng.integers(0, 9))
+            b2 = int(rng.integers(84, 121))
+        else:
+            r2 = max(r1 - int(rng.integers(1, 80)), 40)
+            w2 = int(np.clip(rng.binomial(10, 0.7), 1, 10))
+            b2 = 120 if w2 < 10 else int(rng.integers(72, 121))
+        return (r1, w1, b1), (r2, w2, b2), bat_second if chased else bat_first
+
+    def innings(self, team, runs, wickets, balls, batting_xi, fielding_xi):
+        ''' One innings in the scorecard JSON schema '''
+        rng = self.rng
+
+        # Bowling attack and extras
+        attack = fielding_xi[fielding_xi.role.isin(['Bowler', 'Bowling Allrounder',
+                                                    'Batting Allrounder'])]
+        attack = attack.iloc[:6] if len(attack) >= 5 else fielding_xi.iloc[-6:]
+        spells = np.minimum(rng.multinomial(balls, np.full(len(attack), 1 / len(attack))), 24)
+        while spells.sum() < balls:
+            spells[np.argmin(spells)] += 1
+        nb = rng.poisson(0.08, len(attack))
+        wd = rng.poisson(0.95, len(attack))
+        byes = int(rng.poisson(1.5))
+        bat_runs = max(runs - int(nb.sum() + wd.sum()) - byes, 0)
+        byes = runs - bat_runs - int(nb.sum() + wd.sum())
+
+        # Batting card
+        batters = min(wickets + 2, 11)
+        weights = rng.dirichlet(np.linspace(3, 1, batters))
+        bat_r = rng.multinomial(bat_runs, weights)
+        bat_b = np.maximum(rng.multinomial(balls, (weights + 0.05) / (weights + 0.05).sum()), 0)
+        kinds = list(DISMISSALS)
+        probs = np.array(list(DISMISSALS.values()))
+        dismissed = rng.choice(kinds, size=wickets, p=probs / probs.sum())
+        bowler_of = rng.choice(len(attack), size=wickets, p=spells / spells.sum())
+
+        conceded = rng.multinomial(bat_runs, spells / spells.sum()) + nb + wd
+        wickets_by = np.zeros(len(attack), dtype=int)
+        fielding = {}
+        batting = []
+        for i in range(batters):
+            player = batting_xi.iloc[i]
+            r, b = int(bat_r[i]), int(bat_b[i])
+            sixes = int(rng.binomial(r // 6, 0.3))
+            fours = int(min(rng.binomial(max(r - 6 * sixes, 0) // 4, 0.45), (r - 6 * sixes) // 4))
+            record = {'batsman': {'id': player['id'], 'name': player['name']}}
+            if i < wickets:
+                kind = str(dismissed[i])
+                record['dismissal'] = kind
+                bowler = attack.iloc[bowler_of[i]]
+                if kind in BOWLER_CREDITED:
+                    record['bowler'] = {'id': bowler['id'], 'name': bowler['name']}
+                    wickets_by[bowler_of[i]] += 1
+                if kind in FIELDER_INVOLVED:
+                    fielder = bowler if kind == 'cb' else \
+                        fielding_xi.iloc[int(rng.integers(len(fielding_xi)))]
+                    record['catcher'] = {'id': fielder['id'], 'name': fielder['name']}
+                    tally = fielding.setdefault(fielder['id'], {
+                        'catcher': {'id': fielder['id'], 'name': fielder['name']},
+                        'stumped': 0, 'runout': 0, 'catch': 0, 'cb': 0, 'lbw': 0, 'bowled': 0
+                    })
+                    tally[FIELDER_INVOLVED[kind]] += 1
+                record['dismissal-text'] = kind
+            else:
+                record['dismissal-text'] = 'not out'
+            record.update({
+                'r': r, 'b': b, '4s': fours, '6s': sixes,
+                'sr': round(r / b * 100, 2) if b else 0, '': 0
+            })
+            batting.append(record)
+
+        bowling = []
+        for j in range(len(attack)):
+            if spells[j] == 0:
+                continue
+            bowler = attack.iloc[j]
+            bowling.append({
+                'bowler': {'id': bowler['id'], 'name': bowler['name']},
+                'o': to_overs(int(spells[j])), 'm': 0, 'r': int(conceded[j]),
+                'w': int(wickets_by[j]), 'nb': int(nb[j]), 'wd': int(wd[j]),
+                'eco': round(conceded[j] / (spells[j] / 6), 2)
+            })
+
+        return {
+            'batting': batting,
+            'bowling': bowling,
+            'catching': list(fielding.values()),
+            'extras': {'r': int(runs - bat_runs), 'b': int(byes)},
+            'totals': {},
+            'inning': f'{team} Inning 1'
+        }
+
+    # Matches
+    def match(self, team1, team2, strength, played):
+        ''' Result row and scorecard of one fixture '''
+        match_id = new_id(self.rng)
+        row = {'id': match_id, 'Team1': team1, 'Team2': team2}
+        if not played:
+            return row, None, None
+
+        rng = self.rng
+        toss_winner = team1 if rng.random() < 0.5 else team2
+        toss_choice = 'bowl' if rng.random() < TOSS_BOWL_SHARE else 'bat'
+        other = team2 if toss_winner == team1 else team1
+        bat_first, bat_second = (toss_winner, other) if toss_choice == 'bat' else (other, toss_winner)
+
+        (r1, w1, b1), (r2, w2, b2), winner = self.result(bat_first, bat_second, strength)
+        xi = {bat_first: self.playing_xi(bat_first), bat_second: self.playing_xi(bat_second)}
+        scorecard = [
+            self.innings(bat_first, r1, w1, b1, xi[bat_first], xi[bat_second]),
+            self.innings(bat_second, r2, w2, b2, xi[bat_second], xi[bat_first])
+        ]
+        row.update({
+            'tossWinner': toss_winner, 'tossChoice': toss_choice, 'matchWinner': winner,
+            'Innings1': f'{bat_first} Inning 1', 'r1': r1, 'w1': w1, 'o1': to_overs(b1),
+            'Innings2': f'{bat_second} Inning 1', 'r2': r2, 'w2': w2, 'o2': to_overs(b2)
+        })
+        return row, scorecard, winner
+
+    def season(self, year, limit, unplayed):
+        ''' Fixtures, results and scorecards of one season '''
+        strength = {team: self.rng.normal(0, 0.35) for team in self.teams}
+        fixtures = league_fixtures(self.teams, self.rng)
+        wins = {team: 0 for team in self.teams}
+        day = datetime.date(year, 3, 22)
+
+        rows = []
+        def add(team1, team2):
+            nonlocal day
+            number = len(rows) + 1
+            played = number <= limit - unplayed
+            info, scorecard, winner = self.match(team1, team2, strength, played)
+            if winner is not None:
+                wins[winner] += 1
+            double_header = day.weekday() == 6 and number % 2 == 1
+            fixture = {
+                'MatchID': info['id'],
+                'MatchName': f'{team1} vs {team2}',
+                'MatchNumber': number,
+                'MatchType': 't20',
+                'MatchVenue': self.venue(team1),
+                'MatchDate': day.isoformat(),
+                'MatchDateTime': f"{day.isoformat()} {'10' if double_header else '14'}:00:00",
+                'MatchStarted': played,
+                'MatchEnded': played
+            }
+            if not double_header:
+                day += datetime.timedelta(days=1)
+            rows.append((info, fixture, scorecard))
+            return winner
+
+        for team1, team2 in fixtures:
+            if len(rows) >= limit:
+                return rows
+            add(team1, team2)
+
+        # Playoffs between the top four of the league stage
+        top = sorted(self.teams, key=lambda t: (-wins[t], self.rng.random()))[:4]
+        if len(rows) < limit:
+            q1 = add(top[0], top[1]) or top[0]
+        if len(rows) < limit:
+            eliminator = add(top[2], top[3]) or top[2]
+        if len(rows) < limit:
+            q1_loser = top[1] if q1 == top[0] else top[0]
+            q2 = add(q1_loser, eliminator) or q1_loser
+        if len(rows) < limit:
+            add(q1, q2)
+        return rows
+
+
+def generate(out, seasons=1, matches=None, seed=2025, start_year=2025, unplayed=0):
+    ''' Write a schema-identical dataset under out and return the match count '''
+    squads, home, venues = load_reference()
+    generator = SeasonGenerator(seed, squads, home, venues)
+
+    total = matches if matches is not None else seasons * MATCHES_PER_SEASON
+    n_seasons = math.ceil(total / MATCHES_PER_SEASON)
+
+    os.makedirs(os.path.join(out, 'scorecard'), exist_ok=True)
+    shutil.copytree(os.path.join(SOURCE_DATA, 'squad'), os.path.join(out, 'squad'),
+                    dirs_exist_ok=True)
+
+    infos, fixtures = [], []
+    remaining = total
+    for s in range(n_seasons):
+        limit = min(MATCHES_PER_SEASON, remaining)
+        last = s == n_seasons - 1
+        rows = generator.season(start_year + s, limit, unplayed if last else 0)
+        for info, fixture, scorecard in rows:
+            infos.append(info)
+            fixtures.append(fixture)
+            if scorecard is not None:
+                path = os.path.join(out, 'scorecard', f"{info['id']}.json")
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(scorecard, f)
+        remaining -= len(rows)
+
+    info_columns = ['id', 'Team1', 'Team2', 'tossWinner', 'tossChoice', 'matchWinner',
+                    'Innings1', 'r1', 'w1', 'o1', 'Innings2', 'r2', 'w2', 'o2']
+    tag = format_tag(datetime.date.fromisoformat(fixtures[-1]['MatchDate']))
+    pd.DataFrame(infos, columns=info_columns).to_csv(os.path.join(out, f'match_info-{tag}.csv'))
+    pd.DataFrame(fixtures).to_csv(os.path.join(out, f'match_list-{tag}.csv'))
+    return len(infos)
+
+
+def main():
+    ''' Command line entry point '''
+    parser = argparse.ArgumentParser(description=__doc__.strip(" '"))
+    parser.add_argument('out', help='output data directory')
+    parser.add_argument('--seasons', type=int, default=1, help='number of seasons')
+    parser.add_argument('--matches', type=int, help='total matches, overrides --seasons')
+    parser.add_argument('--seed', type=int, default=2025, help='random seed')
+    parser.add_argument('--start-year', type=int, default=2025, help='year of the first season')
+    parser.add_argument('--unplayed', type=int, default=0,
+                        help='fixtures at the end of the last season left unplayed')
+    args = parser.parse_args()
+
+    count = generate(args.out, args.seasons, args.matches, args.seed,
+                     args.start_year, args.unplayed)
+    print(f'Wrote {count} matches to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+''' Benchmarks for Data Loading and Chart Builders '''
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+import warnings
+
+import pandas as pd
+from generate_dataset import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DATA = os.path.join(ROOT, 'data')
+
+sys.path.insert(0, ROOT)
+from catalog import resolve  # pylint: disable=wrong-import-position
+
+
+# Scaled datasets
+def _copy_id(match_id, copy):
+    ''' Stable id of the n-th replica of a match '''
+    if copy == 0:
+        return match_id
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f'{match_id}/{copy}'))
+
+
+def _shift_year(values, copy):
+    ''' Move dates of the n-th replica back by n seasons '''
+    return (values.str.slice(0, 4).astype(int) - copy).astype(str) + values.str.slice(4)
+
+
+def build_scaled_data(scale, target):
+    ''' Replicate the shipped season `scale` times into target, one replica per season '''
+    source = resolve(SOURCE_DATA)
+    match_info = pd.read_csv(os.path.join(SOURCE_DATA, source.match_info), index_col=0)
+    match_list = pd.read_csv(os.path.join(SOURCE_DATA, source.match_list), index_col=0)
+
+    infos, lists = [], []
+    for copy in range(scale):
+        info = match_info.copy()
+        info['id'] = [_copy_id(i, copy) for i in info['id']]
+        infos.append(info)
+
+        fixtures = match_list.copy()
+        fixtures['MatchID'] = [_copy_id(i, copy) for i in fixtures['MatchID']]
+        fixtures['MatchDate'] = _shift_year(fixtures['MatchDate'], copy)
+        fixtures['MatchDateTime'] = _shift_year(fixtures['MatchDateTime'], copy)
+        lists.append(fixtures)
+
+    os.makedirs(os.path.join(target, 'scorecard'), exist_ok=True)
+    pd.concat(infos, ignore_index=True).to_csv(os.path.join(target, source.match_info))
+    pd.concat(lists, ignore_index=True).to_csv(os.path.join(target, source.match_list))
+    shutil.copytree(os.path.join(SOURCE_DATA, 'squad'), os.path.join(target, 'squad'))
+
+    scorecards = os.path.join(SOURCE_DATA, 'scorecard')
+    for name in os.listdir(scorecards):
+        match_id, ext = os.path.splitext(name)
+        for copy in range(scale):
+            shutil.copyfile(
+                os.path.join(scorecards, name),
+                os.path.join(target, 'scorecard', _copy_id(match_id, copy) + ext)
+            )
+
+
+# Measurement
+def payload_size(result):
+    ''' Serialized size of a figure or table, in bytes '''
+    if hasattr(result, 'to_plotly_json'):
+        return len(result.to_json())
+    if isinstance(result, pd.DataFrame):
+        return len(result.to_json())
+    return None
+
+
+def measure(name, func, repeat, setup=None):
+    ''' Median wall time, peak traced memory and payload size of one case '''
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'case': name,
+        'wall_time_s': statistics.median(timings),
+        'min_time_s': min(timings),
+        'peak_memory_bytes': peak,
+        'payload_bytes': payload_size(result)
+    }
+
+
+def run_cases(repeat):
+    ''' Every benchmark case against the dataset in IPL_DATA_DIR '''
+    # Imported here so the modules resolve paths from the worker's IPL_DATA_DIR
+    sys.path.insert(0, ROOT)
+    import datastore
+    import encoding
+    import match_store
+    import scorecards
+    import series_analysis
+    import team_performance
+    import match_analysis
+    import players
+    import squads
+    import kpis
+    import dataset
+
+    def clear_memory():
+        datastore._memo.clear()
+        match_store._state.update(manifest=None, partitions={})
+        scorecards._indexed.clear()
+        scorecards._state.update(entry=None)
+        squads._squads.clear()
+        squads._registry.clear()
+        squads._state.update(entry=None)
+        team_performance._team_index.clear()
+        encoding._state.update(values=None, dtypes={})
+
+    def clear_disk():
+        clear_memory()
+        shutil.rmtree(datastore.CACHE_DIR, ignore_errors=True)
+
+    results = []
+    current = datastore.snapshot()
+    csv_files = [datastore.data_path(current.match_info), datastore.data_path(current.match_list)]
+    results.append(measure(
+        'load.csv_parse', lambda: [pd.read_csv(path) for path in csv_files], repeat
+    ))
+    results.append(measure(
+        'load.tables_cold', lambda: match_store.load_matches(), repeat, setup=clear_disk
+    ))
+    results.append(measure(
+        'load.tables_disk', lambda: match_store.load_matches(), repeat, setup=clear_memory
+    ))
+    results.append(measure('load.tables_memo', lambda: match_store.load_matches(), repeat))
+    results.append(measure(
+        'scorecards.json_parse',
+        lambda: [scorecards.read_scorecard(p) for p in scorecards.scorecard_files()
+                 if os.path.getsize(p)],
+        repeat
+    ))
+    results.append(measure(
+        'scorecards.tables_cold', scorecards.load_tables, repeat, setup=clear_disk
+    ))
+    results.append(measure(
+        'scorecards.tables_disk', scorecards.load_tables, repeat, setup=clear_memory
+    ))
+    results.append(measure('squads.registry_cold', squads.load_squads, repeat, setup=clear_disk))
+
+    # Warm every store before timing the builders
+    match_store.load_matches()
+    scorecards.load_tables()
+    squads.load_squads()
+
+    for name in series_analysis.figure_names():
+        builder = series_analysis._builders[name]
+        results.append(measure(f'series_analysis.{name}', builder, repeat))
+
+    teams = sorted(datastore.load_match_info().Team1.str.replace(' ', '_').unique())
+    for name in ('sunburst', 'match_count', 'performance', 'toss_performance', 'toss_choice'):
+        builder = getattr(team_performance, name).uncached
+        results.append(measure(
+            f'team_performance.{name}', lambda b=builder: [b(team) for team in teams][-1], repeat
+        ))
+    results.append(measure(
+        'team_performance.overseas_players',
+        lambda: [team_performance.overseas_players(team) for team in teams][-1],
+        repeat
+    ))
+
+    innings = scorecards.load_tables()['innings']
+    match_id = innings['match_id'].iloc[0]
+    _, batting, bowling = scorecards.innings_data(match_id, 1)
+    cases = {
+        'dismissals': lambda: batting['dismissal'].value_counts(),
+        'boundaries': lambda: batting.groupby('batsman')[['4s', '6s']].sum().reset_index(),
+        'batsman_perf': lambda: batting,
+        'bowler_perf': lambda: bowling,
+        'fielder_perf': lambda: batting
+    }
+    for name, data in cases.items():
+        builder = getattr(match_analysis, name).uncached
+        results.append(measure(f'match_analysis.{name}', lambda b=builder, d=data: b(d()), repeat))
+
+    # Cache hits: the cached builders, after one call has stored each figure
+    hits = {
+        'match_analysis.batsman_perf': lambda: match_analysis.batsman_perf(batting),
+        'match_analysis.fielder_perf': lambda: match_analysis.fielder_perf(batting),
+        'team_performance.performance': lambda: team_performance.performance(teams[-1])
+    }
+    for name, func in hits.items():
+        func()
+        results.append(measure(f'{name}.cache_hit', func, repeat))
+
+    catches = players.catch_rows()
+    for mode in ('bars', 'heatmap', 'stacked'):
+        results.append(measure(
+            f'match_analysis.fielder_perf.archive_{mode}',
+            lambda m=mode: match_analysis.fielder_perf.uncached(catches, mode=m), repeat
+        ))
+
+    results.append(measure(
+        'match_analysis.archive_fielders', match_analysis.archive_fielders.uncached, repeat
+    ))
+
+    career = players.career().rename(
+        columns={'name': 'batsman', 'runs': 'r', 'balls': 'b', 'strike_rate': 'sr'}
+    )
+    results.append(measure(
+        'match_analysis.batsman_perf.career',
+        lambda: match_analysis.batsman_perf.uncached(career), repeat
+    ))
+
+    # Innings KPIs summed on the flat tables and on the memory-mapped rows
+    data = dataset.current()
+    results.append(measure(
+        'kpis.tables',
+        lambda: kpis.compute_kpis(data.table('batting'), data.table('bowling'), data.table('innings')),
+        repeat
+    ))
+    results.append(measure('kpis.rows', lambda: kpis.row_kpis(data), repeat))
+
+    return results
+
+
+def git_commit():
+    ''' Current commit of the repository, if available '''
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(scale, repeat, workdir, synthetic=False):
+    ''' Build a scaled dataset and benchmark it in a fresh interpreter '''
+    if synthetic:
+        data_dir = os.path.join(workdir, f'synthetic{scale}')
+        generate(data_dir, seasons=scale)
+    elif scale == 1:
+        data_dir = os.path.join(workdir, 'x1')
+        shutil.copytree(SOURCE_DATA, data_dir, ignore=shutil.ignore_patterns('.cache'))
+    else:
+        data_dir = os.path.join(workdir, f'x{scale}')
+        build_scaled_data(scale, data_dir)
+
+    env = dict(os.environ, IPL_DATA_DIR=data_dir)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', '--repeat', str(repeat)],
+        env=env, capture_output=True, text=True, check=True
+    )
+    results = json.loads(completed.stdout.splitlines()[-1])
+    for result in results:
+        result['scale'] = scale
+    return results
+
+
+def compare(current, baseline_file):
+    ''' Print wall time ratios against an earlier results file '''
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['scale'], r['case']): r for r in baseline['results']}
+    print(f"{'case':45} {'scale':>5} {'before':>10} {'after':>10} {'ratio':>7}")
+    for result in current['results']:
+        old = before.get((result['scale'], result['case']))
+        if old is None:
+            continue
+        ratio = result['wall_time_s'] / old['wall_time_s'] if old['wall_time_s'] else float('nan')
+        print(f"{result['case']:45} {result['scale']:>5} "
+              f"{old['wall_time_s']:>10.4f} {result['wall_time_s']:>10.4f} {ratio:>7.2f}")
+
+
+def main():
+    ''' Command line entry point '''
+    parser = argparse.ArgumentParser(description=__doc__.strip(" '"))
+    parser.add_argument('--scales', default='1,10,100',
+                        help='comma separated multiples of the shipped season')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'bench_output.json'),
+                        help='machine-readable results file')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='generate one synthetic season per scale step instead of replicas')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    if args.worker:
+        print(json.dumps(run_cases(args.repeat)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='ipl-bench-') as workdir:
+        for scale in (int(s) for s in args.scales.split(',')):
+            print(f'Running scale x{scale} ...', file=sys.stderr)
+            results.extend(run_scale(scale, args.repeat, workdir, args.synthetic))
+
+    report = {
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': 'synthetic' if args.synthetic else 'replicated',
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {len(results)} results to {args.output}', file=sys.stderr)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+''' Dataset Catalog of Match Snapshots '''
+import datetime
+import os
+import re
+from collections import namedtuple
+
+# Initialization
+SNAPSHOT_PATTERN = re.compile(r'^match_(info|list)-(\d{1,2})([a-z]{3})(\d{2})\.csv$')
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+Snapshot = namedtuple('Snapshot', ['version', 'date', 'match_info', 'match_list'])
+
+
+def parse_tag(tag):
+    ''' Date of a snapshot tag such as 10jun25 '''
+    match = re.fullmatch(r'(\d{1,2})([a-z]{3})(\d{2})', tag)
+    if match is None or match.group(2) not in MONTHS:
+        raise ValueError(f'Invalid snapshot tag: {tag}')
+    day, month, year = match.groups()
+    return datetime.date(2000 + int(year), MONTHS.index(month) + 1, int(day))
+
+
+def format_tag(date):
+    ''' Snapshot tag of a date, e.g. 2025-06-10 -> 10jun25 '''
+    return f'{date.day}{MONTHS[date.month - 1]}{date.year % 100:02d}'
+
+
+def discover(directory):
+    ''' Snapshot files found in a data directory, by kind and date '''
+    found = {'info': {}, 'list': {}}
+    for name in os.listdir(directory):
+        match = SNAPSHOT_PATTERN.match(name)
+        if match is None or match.group(3) not in MONTHS:
+            continue
+        kind = match.group(1)
+        found[kind][parse_tag(''.join(match.groups()[1:]))] = name
+    return found
+
+
+def snapshots(directory):
+    '''
+    Snapshots in a data directory, oldest first. Each match_info file is
+    paired with the match_list file closest to it in date.
+    '''
+    found = discover(directory)
+    list_dates = sorted(found['list'])
+    result = []
+    for date in sorted(found['info']):
+        if not list_dates:
+            break
+        nearest = min(list_dates, key=lambda d: (abs((d - date).days), d > date))
+        result.append(Snapshot(format_tag(date), date, found['info'][date], found['list'][nearest]))
+    return result
+
+
+def resolve(directory, version='latest'):
+    ''' Latest snapshot, or the one pinned by its tag '''
+    available = snapshots(directory)
+    if not available:
+        raise FileNotFoundError(f'No match_info/match_list snapshots under {directory}')
+    if version in (None, '', 'latest'):
+        return available[-1]
+    for snapshot in available:
+        if snapshot.version == version:
+            return snapshot
+    tags = ', '.join(s.version for s in available)
+    raise KeyError(f'Unknown snapshot {version!r}; available: {tags}')
@@ -0,0 +1,137 @@
+''' Process-Wide Read-Only Dataset Shared by All Sessions '''
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from datastore import load_match_list, snapshot, table_version
+from match_store import dataset_version, load_matches, refresh as refresh_store
+from players import totals
+from scorecards import load_tables, refresh as refresh_scorecards, scorecard_version
+from squads import load_squads, refresh as refresh_squads, squad_version
+
+# Initialization
+# Sessions reuse the loaded dataset for this long before the sources are checked again
+REFRESH_SECONDS = float(os.environ.get('IPL_REFRESH_SECONDS', 30))
+
+_refresh_lock = threading.Lock()
+_state = {'dataset': None, 'checked': 0.0}
+
+
+class Dataset:
+    '''
+    Immutable snapshot of every table the dashboard reads, shared by all
+    sessions, with the match store's scope revisions as of the same load
+    '''
+    __slots__ = ('version', 'loaded_at', '_tables', '_scopes', '_store', '_footprint')
+
+    def __init__(self, version, tables, scopes=None, store=None):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'loaded_at', time.time())
+        object.__setattr__(self, '_tables', MappingProxyType(dict(tables)))
+        object.__setattr__(self, '_scopes', MappingProxyType(dict(scopes or {})))
+        object.__setattr__(self, '_store', MappingProxyType(dict(store or {})))
+        # Measured once: deep memory usage walks every string of every table
+        sizes = {
+            name: int(frame.memory_usage(deep=True, index=True).sum())
+            for name, frame in self._tables.items()
+        }
+        sizes['total'] = sum(sizes.values())
+        object.__setattr__(self, '_footprint', MappingProxyType(sizes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Dataset is read-only')
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def names(self):
+        ''' Names of the tables held '''
+        return list(self._tables)
+
+    def table(self, name):
+        ''' A table as a shallow copy: columns can be added, the shared data is left alone '''
+        return self._tables[name].copy(deep=False)
+
+    def matches(self, seasons=None):
+        ''' Joined matches of all seasons, or only of the seasons asked for, as a shallow copy '''
+        matches = self.table('matches')
+        if seasons is None:
+            return matches
+        return matches[matches['season'].isin(list(seasons))].reset_index(drop=True)
+
+    def store(self):
+        ''' Match store manifest the matches table was loaded from: rows, partitions, version '''
+        return self._store
+
+    def scope(self, name):
+        '''
+        Revision at which a scope last changed: series, season:<y>, team:<name>
+        and match:<id> from the match store; scorecards and squads from their files
+        '''
+        return self._scopes.get(name)
+
+    def footprint(self):
+        ''' Bytes held by each table, and in total, as measured at load '''
+        return dict(self._footprint)
+
+
+def source_versions():
+    ''' Content versions of every source the dataset is built from '''
+    current = snapshot()
+    return (
+        dataset_version(),
+        table_version(current.match_info),
+        table_version(current.match_list),
+        scorecard_version(),
+        squad_version()
+    )
+
+
+def _load(version):
+    '''
+    Build a dataset from the stores: the joined matches (the one shared copy
+    of the match table), the fixture list, the indexed scorecard tables, the
+    player totals and the squads
+    '''
+    manifest = refresh_store()
+    matches = load_matches()
+    if 'MatchVenue' in matches:
+        matches['Cities'] = matches.MatchVenue.str.split(',', n=1, expand=True)[1]
+    tables = {'matches': matches, 'match_list': load_match_list()}
+    tables.update(load_tables())
+    tables['player_totals'] = totals()
+    tables['squads'] = load_squads()
+    scopes = {**manifest['scopes'], 'scorecards': scorecard_version(), 'squads': squad_version()}
+    return Dataset(version, tables, scopes, manifest)
+
+
+def refresh(force=False):
+    '''
+    Reload the dataset if any source changed, and swap it in with a single
+    reference assignment. Sessions keep reading the previous dataset until then.
+    '''
+    with _refresh_lock:
+        dataset = _state['dataset']
+        # The scorecard archive and the squad files are globbed here, not on every read
+        refresh_scorecards()
+        refresh_squads()
+        version = source_versions()
+        if force or dataset is None or dataset.version != version:
+            dataset = _load(version)
+            _state['dataset'] = dataset
+        _state['checked'] = time.monotonic()
+        return dataset
+
+
+def current():
+    '''
+    The shared dataset. Sources are checked at most every REFRESH_SECONDS;
+    while another session is reloading, the previous dataset is returned.
+    '''
+    dataset = _state['dataset']
+    if dataset is not None and time.monotonic() - _state['checked'] < REFRESH_SECONDS:
+        return dataset
+    if dataset is not None and _refresh_lock.locked():
+        return dataset
+    return refresh()
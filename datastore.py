@@ -0,0 +1,241 @@
+''' Columnar On-Disk Cache for Source Tables '''
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from catalog import resolve
+
+# Initialization
+DATA_DIR = os.environ.get(
+    'IPL_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+DATA_VERSION = os.environ.get('IPL_DATA_VERSION', 'latest')
+
+_lock = threading.Lock()
+_memo = {}
+
+
+def data_path(*parts):
+    ''' Absolute path of a file under the data directory '''
+    return os.path.join(DATA_DIR, *parts)
+
+
+def _file_hash(path):
+    ''' SHA-256 of a file's contents '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat(path):
+    ''' Modification time and size of a file '''
+    info = os.stat(path)
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _signature(sources, previous=None):
+    ''' Fingerprint of the source files, re-hashing only those whose mtime moved '''
+    previous = previous or {}
+    signature = {}
+    for path in sources:
+        stat = _stat(path)
+        known = previous.get(path)
+        if known is not None and known['stat'] == stat:
+            signature[path] = known
+        else:
+            signature[path] = {'stat': stat, 'sha256': _file_hash(path)}
+    return signature
+
+
+def _digest(signature):
+    ''' Content digest of a signature, independent of mtimes '''
+    digest = hashlib.sha256()
+    for path in sorted(signature):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(signature[path]['sha256'].encode('ascii'))
+    return digest.hexdigest()
+
+
+def _frame_to_arrays(frame, prefix):
+    ''' Typed column arrays for a DataFrame; strings are stored with a null mask '''
+    arrays = {}
+    columns = []
+    for i, name in enumerate(frame.columns):
+        key = f'{prefix}{i}'
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            arrays[key] = column.cat.codes.to_numpy()
+            arrays[key + '_categories'] = column.cat.categories.to_numpy().astype(str)
+            kind = 'category'
+        elif column.dtype == object:
+            mask = column.isna().to_numpy()
+            arrays[key] = np.where(mask, '', column.astype(str)).astype(str)
+            arrays[key + '_null'] = mask
+            kind = 'str'
+        else:
+            arrays[key] = column.to_numpy()
+            kind = 'native'
+        columns.append({'name': name, 'key': key, 'kind': kind})
+    return arrays, columns
+
+
+def _arrays_to_frame(arrays, columns):
+    ''' Rebuild a DataFrame from its typed column arrays '''
+    data = {}
+    for column in columns:
+        key = column['key']
+        values = arrays[key]
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, arrays[key + '_categories'])
+        elif column['kind'] == 'str':
+            values = values.astype(object)
+            values[arrays[key + '_null']] = np.nan
+        data[column['name']] = values
+    return pd.DataFrame(data, columns=[c['name'] for c in columns])
+
+
+def _write(cache_file, frames, signature):
+    ''' Persist frames and their source signature into one .npz file '''
+    arrays = {}
+    layout = {}
+    for t, (table, frame) in enumerate(frames.items()):
+        table_arrays, columns = _frame_to_arrays(frame, f't{t}c')
+        arrays.update(table_arrays)
+        layout[table] = columns
+    meta = {'signature': signature, 'layout': layout}
+    arrays['__meta__'] = np.array(json.dumps(meta))
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp.npz'
+    np.savez(tmp_file, **arrays)
+    os.replace(tmp_file, cache_file)
+
+
+def _read_meta(cache_file):
+    ''' Metadata stored alongside a cached table, or None '''
+    try:
+        with np.load(cache_file, allow_pickle=False) as store:
+            return json.loads(str(store['__meta__']))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _read(cache_file, layout):
+    ''' Load every table of a cache file '''
+    with np.load(cache_file, allow_pickle=False) as store:
+        arrays = {key: store[key] for key in store.files}
+    return {table: _arrays_to_frame(arrays, columns) for table, columns in layout.items()}
+
+
+def _appended(before, after):
+    ''' Sources added since a signature, or None if any earlier source changed or went away '''
+    for path, known in before.items():
+        current = after.get(path)
+        if current is None or current['sha256'] != known['sha256']:
+            return None
+    return [path for path in after if path not in before]
+
+
+def cached_frames(name, sources, build, update=None, stale=None):
+    '''
+    Tables produced by build(sources), compiled once into data/.cache/<name>.npz
+    and reused while the sources keep the same content. When `update` is given
+    and sources were only added, update(frames, added) folds them into the
+    stored tables instead of rebuilding. When `stale` is given, stored tables
+    for which stale(frames) is true are rebuilt even if the sources are unchanged.
+    '''
+    sources = sorted(sources)
+    cache_file = os.path.join(CACHE_DIR, f'{name}.npz')
+
+    with _lock:
+        entry = _memo.get(name)
+        if entry is not None:
+            known = entry['signature']
+        else:
+            meta = _read_meta(cache_file)
+            known = meta['signature'] if meta else None
+
+        signature = _signature(sources, known)
+        version = _digest(signature)
+        if entry is not None and entry['version'] == version and not (stale and stale(entry['frames'])):
+            entry['signature'] = signature
+            return entry
+
+        meta = _read_meta(cache_file)
+        if meta and _digest(meta['signature']) == version:
+            frames = _read(cache_file, meta['layout'])
+            if stale and stale(frames):
+                frames = build(sources)
+                _write(cache_file, frames, signature)
+            elif meta['signature'] != signature:
+                _write(cache_file, frames, signature)
+        else:
+            added = _appended(meta['signature'], signature) if meta and update else None
+            if added is not None:
+                stored = _digest(meta['signature'])
+                if entry is not None and entry['version'] == stored:
+                    frames = entry['frames']
+                else:
+                    frames = _read(cache_file, meta['layout'])
+                frames = update(frames, sorted(added))
+                if stale and stale(frames):
+                    frames = build(sources)
+            else:
+                frames = build(sources)
+            _write(cache_file, frames, signature)
+
+        entry = {'frames': frames, 'signature': signature, 'version': version}
+        _memo[name] = entry
+        return entry
+
+
+def _read_csv(sources):
+    ''' Build step for a single CSV source '''
+    return {'table': pd.read_csv(sources[0])}
+
+
+def read_table(filename):
+    ''' Load a CSV under data/ through the columnar cache '''
+    path = data_path(filename)
+    name = os.path.splitext(filename)[0].replace(os.sep, '_')
+    frame = cached_frames(name, [path], _read_csv)['frames']['table']
+    return frame.copy(deep=False)
+
+
+def table_version(filename):
+    ''' Content hash of a cached CSV source '''
+    path = data_path(filename)
+    name = os.path.splitext(filename)[0].replace(os.sep, '_')
+    return cached_frames(name, [path], _read_csv)['version']
+
+
+def save_frame(path, frame):
+    ''' Write one frame to a standalone .npz file '''
+    _write(path, {'table': frame}, {})
+
+
+def load_frame(path):
+    ''' Read a frame written by save_frame '''
+    return _read(path, _read_meta(path)['layout'])['table']
+
+
+def snapshot():
+    ''' Match snapshot in use: the latest under data/, or IPL_DATA_VERSION '''
+    return resolve(DATA_DIR, DATA_VERSION)
+
+
+def load_match_info():
+    ''' Match results table '''
+    return read_table(snapshot().match_info)
+
+
+def load_match_list():
+    ''' Match fixtures table '''
+    return read_table(snapshot().match_list)
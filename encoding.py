@@ -0,0 +1,176 @@
+''' Shared Dictionary Encoding for Player Ids, Team Names and Match Ids '''
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from datastore import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Initialization
+DICTIONARY_FILE = os.path.join(CACHE_DIR, 'dictionaries.json')
+LOCK_FILE = f'{DICTIONARY_FILE}.lock'
+KINDS = ('player', 'team', 'match')
+
+_lock = threading.Lock()
+_state = {'values': None, 'dtypes': {}}
+
+
+def _read():
+    ''' Dictionaries of every kind as stored on disk '''
+    try:
+        with open(DICTIONARY_FILE, 'r', encoding='utf-8') as f:
+            values = json.load(f)
+    except (OSError, ValueError):
+        values = {}
+    return {kind: list(values.get(kind, [])) for kind in KINDS}
+
+
+def _load():
+    ''' Dictionaries of every kind, read from disk once per process and merged on every save '''
+    if _state['values'] is None:
+        _state['values'] = _read()
+    return _state['values']
+
+
+@contextlib.contextmanager
+def _file_lock():
+    ''' Exclusive lock across processes on the dictionary file, where fcntl is available '''
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(LOCK_FILE, 'a', encoding='utf-8') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _merge(values, stored):
+    '''
+    Bring the in-memory dictionaries up to the stored ones, in place. Values
+    other processes appended are adopted; a stored list that no longer
+    extends ours (written before saves were merged) wins.
+    '''
+    for kind in KINDS:
+        mine, theirs = values[kind], stored[kind]
+        if theirs[:len(mine)] == mine:
+            mine.extend(theirs[len(mine):])
+        elif mine[:len(theirs)] != theirs:
+            mine[:] = theirs
+            _state['dtypes'].pop(kind, None)
+
+
+def _save(values):
+    ''' Atomically replace the stored dictionaries '''
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_file = f'{DICTIONARY_FILE}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(values, f)
+    os.replace(tmp_file, DICTIONARY_FILE)
+
+
+def dtype(kind):
+    ''' Categorical dtype holding every value of a kind seen so far, in code order '''
+    with _lock:
+        values = _load()[kind]
+        cached = _state['dtypes'].get(kind)
+        if cached is None or len(cached.categories) != len(values):
+            cached = _state['dtypes'][kind] = pd.CategoricalDtype(values)
+        return cached
+
+
+def _register(kind, candidates):
+    '''
+    Append values not yet in a dictionary; codes already handed out never
+    change. The stored dictionaries are re-read and merged under a file lock
+    before saving, so concurrent processes never overwrite each other's codes.
+    '''
+    with _lock:
+        values = _load()
+        known = set(values[kind])
+        unseen = [v for v in pd.unique(candidates) if isinstance(v, str) and v not in known]
+        if not unseen:
+            return
+        with _file_lock():
+            _merge(values, _read())
+            known = set(values[kind])
+            values[kind].extend(v for v in unseen if v not in known)
+            _save(values)
+
+
+def _candidates(values):
+    ''' Distinct values of an array, Series or Categorical '''
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        return np.asarray(values.categories, dtype=object)
+    return pd.unique(np.asarray(values, dtype=object))
+
+
+def encode(values, kind):
+    ''' Values as a Categorical sharing the global codes of their kind '''
+    _register(kind, _candidates(values))
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        if values.dtype == dtype(kind):
+            return values
+        return values.set_categories(dtype(kind).categories)
+    return pd.Categorical(np.asarray(values, dtype=object), dtype=dtype(kind))
+
+
+def encode_columns(frame, columns, kind):
+    ''' Replace columns of a frame with their shared-code Categoricals, in place '''
+    # Register every column first so they all end up on the same categories
+    _register(kind, np.concatenate([_candidates(frame[column]) for column in columns]))
+    for column in columns:
+        frame[column] = encode(frame[column], kind)
+    return frame
+
+
+def dictionary_size(kind):
+    ''' Number of values registered for a kind '''
+    with _lock:
+        return len(_load()[kind])
+
+
+def generation():
+    ''' Sizes of every dictionary; changes whenever a new value is registered '''
+    with _lock:
+        values = _load()
+        return tuple(len(values[kind]) for kind in KINDS)
+
+
+def codes(values, kind):
+    ''' Integer codes of values in a kind's dictionary; -1 for missing values '''
+    return encode(values, kind).codes.astype('int32')
+
+
+def code_of(value, kind):
+    ''' Code of one value, or -1 when it has never been seen '''
+    categories = dtype(kind).categories
+    position = categories.get_indexer([value])[0]
+    return int(position)
+
+
+def decode(codes, kind):
+    ''' Values of integer codes; -1 decodes to a missing value '''
+    return pd.Categorical.from_codes(np.asarray(codes), dtype=dtype(kind)).to_numpy(dtype=object)
+
+
+def fingerprint(kind, length):
+    ''' Digest of the first `length` values of a dictionary, to validate stored codes '''
+    with _lock:
+        values = _load()[kind]
+        if len(values) < length:
+            return None
+        return hashlib.sha256(json.dumps(values[:length]).encode('utf-8')).hexdigest()
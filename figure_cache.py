@@ -0,0 +1,134 @@
+''' Versioned LRU Cache for Plotly Figures '''
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Initialization
+DEFAULT_SIZE = int(os.environ.get('IPL_FIGURE_CACHE_SIZE', 512))
+
+
+class FigureCache:
+    ''' Size-bounded LRU store of serialized figure JSON with hit/miss counters '''
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        ''' Cached payload for a key, or None '''
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        ''' Store a payload, evicting the least recently used entries '''
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        ''' (key, payload) pairs, least recently used first '''
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        ''' Drop every entry and reset the counters '''
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        ''' Hit/miss counters and current size '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'bytes': sum(len(payload) for payload in self._entries.values())
+            }
+
+
+cache = FigureCache()
+# Optional loader of payloads for keys missing from the cache, e.g. from a pre-rendered bundle
+fallback = {'loader': None}
+
+
+def param_key(value):
+    ''' Hashable key for a builder argument; frames are keyed by their content '''
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr(list(names)).encode('utf-8'))
+        return ('frame', digest.hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(param_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, param_key(v)) for k, v in value.items()))
+    return value
+
+
+def as_figure(payload):
+    '''
+    Fresh go.Figure from a cached JSON payload. The payload was produced by a
+    validated figure, so it is not validated again.
+    '''
+    data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+    return go.Figure(data, _validate=False)
+
+
+def cached_figure(version=None, scope=None):
+    '''
+    Decorator caching a figure builder by (builder, parameters, dataset version).
+    `scope` maps the builder's arguments to the revision of the data they read,
+    so an update only invalidates the figures it touches.
+    Figures are stored as JSON and a fresh go.Figure is returned on every call.
+    '''
+    def decorator(builder):
+        name = f'{builder.__module__}.{builder.__qualname__}'
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            key = (
+                name,
+                param_key(args),
+                param_key(kwargs),
+                version() if version is not None else None,
+                scope(*args, **kwargs) if scope is not None else None
+            )
+            payload = cache.get(key)
+            if payload is None and fallback['loader'] is not None:
+                payload = fallback['loader'](key)
+            if payload is None:
+                payload = builder(*args, **kwargs).to_json()
+            cache.put(key, payload)
+            return as_figure(payload)
+
+        wrapper.uncached = builder
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+''' Head-to-Head Records Between Teams '''
+import numpy as np
+import pandas as pd
+from dataset import current
+from venues import at_venue
+
+# Initialization
+_matrices = {}
+
+
+def _day(value):
+    ''' ISO date string of a date, timestamp or date-like string '''
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def filter_matches(data, venue=None, start=None, end=None):
+    ''' Matches at a venue (full name or city) and/or within a date range, inclusive '''
+    mask = np.ones(len(data), dtype=bool)
+    if venue is not None:
+        venues = data['MatchVenue'].astype(object)
+        hits = [name for name in venues.dropna().unique() if at_venue(name, venue)]
+        mask &= venues.isin(hits).to_numpy()
+    if start is not None:
+        mask &= (data['MatchDate'] >= _day(start)).to_numpy()
+    if end is not None:
+        mask &= (data['MatchDate'] <= _day(end)).to_numpy()
+    return data[mask]
+
+
+def compute_matrix(data, teams=None):
+    '''
+    Team-by-team records in one pass over the matches. Returns a dict of
+    square frames indexed by team (rows) and opponent (columns): played, won,
+    and won_home / won_away for wins as Team1 / Team2.
+    '''
+    if teams is None:
+        teams = pd.unique(np.concatenate([data['Team1'].to_numpy(), data['Team2'].to_numpy()]))
+    teams = pd.Index(teams, name='Team')
+    n = len(teams)
+
+    team1 = teams.get_indexer(data['Team1'])
+    team2 = teams.get_indexer(data['Team2'])
+    winner = teams.get_indexer(data['matchWinner'])
+    known = (team1 >= 0) & (team2 >= 0)
+    team1, team2, winner = team1[known], team2[known], winner[known]
+
+    played = np.bincount(team1 * n + team2, minlength=n * n).reshape(n, n)
+    played = played + played.T
+    home = winner == team1
+    away = winner == team2
+    won_home = np.bincount(team1[home] * n + team2[home], minlength=n * n).reshape(n, n)
+    won_away = np.bincount(team2[away] * n + team1[away], minlength=n * n).reshape(n, n)
+
+    opponents = teams.rename('Opponent')
+
+    def frame(values):
+        return pd.DataFrame(values, index=teams, columns=opponents)
+
+    return {
+        'played': frame(played),
+        'won': frame(won_home + won_away),
+        'won_home': frame(won_home),
+        'won_away': frame(won_away)
+    }
+
+
+def matrix(venue=None, start=None, end=None):
+    ''' Head-to-head matrices for the archive, or for a venue / date window '''
+    if venue is None and start is None and end is None:
+        dataset = current()
+        matrix = _matrices.get(dataset.version)
+        if matrix is None:
+            matrix = compute_matrix(dataset.table('matches'))
+            _matrices.clear()
+            _matrices[dataset.version] = matrix
+        return matrix
+    return compute_matrix(filter_matches(current().table('matches'), venue, start, end))
+
+
+def head_to_head(team, opponent, venue=None, start=None, end=None):
+    ''' Played, won, lost and no-result counts of one team against another '''
+    team = team.replace('_', ' ')
+    opponent = opponent.replace('_', ' ')
+    if venue is None and start is None and end is None:
+        records = matrix()
+    else:
+        data = filter_matches(current().table('matches'), venue, start, end)
+        pair = data[
+            ((data['Team1'] == team) & (data['Team2'] == opponent)) |
+            ((data['Team1'] == opponent) & (data['Team2'] == team))
+        ]
+        records = compute_matrix(pair, [team, opponent])
+
+    def count(table, row, column):
+        if row not in table.index or column not in table.columns:
+            return 0
+        return int(table.at[row, column])
+
+    played = count(records['played'], team, opponent)
+    won = count(records['won'], team, opponent)
+    lost = count(records['won'], opponent, team)
+    return {
+        'team': team,
+        'opponent': opponent,
+        'played': played,
+        'won': won,
+        'lost': lost,
+        'no_result': played - won - lost
+    }
+
+
+def summary(records=None):
+    '''
+    One row per team: matches played, matches won, and the opponents it beat
+    both as Team1 and as Team2 (Dominating)
+    '''
+    records = records if records is not None else matrix()
+    won_home = records['won_home'].to_numpy()
+    won_away = records['won_away'].to_numpy()
+    teams = records['played'].index
+    dominating = (won_home > 0) & (won_away > 0)
+    np.fill_diagonal(dominating, False)
+
+    return pd.DataFrame({
+        'Team': teams.to_numpy(),
+        'Matches_Played': records['played'].to_numpy().sum(axis=1),
+        'Matches_Won': records['won'].to_numpy().sum(axis=1),
+        'Dominating': [teams[row].tolist() for row in dominating]
+    })
@@ -0,0 +1,86 @@
+''' Innings KPIs for Every Match '''
+import numpy as np
+import pandas as pd
+from dataset import current
+from encoding import decode
+from rowstore import innings_sums
+from scorecards import KEYS
+
+# Initialization
+# KPI column -> summed scorecard field
+BATTING_SUMS = {'total_runs': 'r', 'total_balls': 'b', 'total_dismissals': 'out', 'fours': '4s', 'sixes': '6s'}
+BOWLING_SUMS = {'no_balls': 'nb', 'wides': 'wd', 'bowling_extras': 'extras'}
+
+_kpis = {}
+
+
+def _assemble(kpis, extras, innings):
+    ''' KPI table of every innings from its batting and bowling sums '''
+    balls = kpis['total_balls'].to_numpy(dtype=float)
+    runs = kpis['total_runs'].to_numpy(dtype=float)
+    strike = np.divide(runs * 100, balls, out=np.full_like(runs, np.nan), where=balls > 0)
+    kpis['team_strike'] = np.round(strike, 2)
+
+    teams = innings.reset_index(drop=True).set_index(KEYS)[['team']]
+
+    kpis = teams.join(kpis, how='left').join(extras, how='left')
+    counts = [c for c in kpis.columns if c not in ('team', 'team_strike')]
+    kpis[counts] = kpis[counts].fillna(0).astype('int64')
+    return kpis.sort_index()
+
+
+def compute_kpis(batting, bowling, innings):
+    ''' Team KPIs for every innings in one grouped pass over the flat tables '''
+    bat = batting.reset_index(drop=True)
+    bat = bat.assign(out=bat['dismissal'].notna())
+    kpis = bat.groupby(KEYS, sort=True).agg(
+        **{column: (field, 'sum') for column, field in BATTING_SUMS.items()}
+    )
+    extras = bowling.reset_index(drop=True).groupby(KEYS, sort=True).agg(
+        **{column: (field, 'sum') for column, field in BOWLING_SUMS.items()}
+    )
+    return _assemble(kpis, extras, innings)
+
+
+def _row_sums(table, columns, dataset):
+    ''' Per-innings sums from the memory-mapped scorecard rows, keyed like the flat tables '''
+    sums = innings_sums(table, list(columns.values()), dataset)
+    index = pd.MultiIndex.from_arrays(
+        [decode(sums['match'], 'match'), sums['innings'].astype('int64')], names=KEYS
+    )
+    return pd.DataFrame({column: sums[field] for column, field in columns.items()}, index=index)
+
+
+def row_kpis(dataset):
+    ''' Team KPIs of a dataset, summed on the shared memory-mapped rows rather than its tables '''
+    return _assemble(
+        _row_sums('batting', BATTING_SUMS, dataset),
+        _row_sums('bowling', BOWLING_SUMS, dataset),
+        dataset.table('innings')
+    )
+
+
+def innings_kpis():
+    ''' KPI table keyed by (match_id, innings_no) for the whole archive '''
+    dataset = current()
+    table = _kpis.get(dataset.version)
+    if table is None:
+        table = row_kpis(dataset)
+        _kpis.clear()
+        _kpis[dataset.version] = table
+    return table
+
+
+def match_kpis(match_id, innings_no):
+    ''' KPIs of one innings, or None when it has no scorecard '''
+    kpis = innings_kpis()
+    try:
+        return kpis.loc[(match_id, innings_no)]
+    except KeyError:
+        return None
+
+
+def leaders(metric, n=10, ascending=False):
+    ''' Innings ranked by a KPI across the archive '''
+    kpis = innings_kpis()
+    return kpis.sort_values(metric, ascending=ascending).head(n)
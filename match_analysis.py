@@ -1,9 +1,15 @@
 ''' IPL Match Analysis '''
 import plotly.graph_objects as go
 import plotly.colors as pc
+import pandas as pd
+from dataset import current
+from figure_cache import cached_figure
+from players import catch_rows, overs_to_balls
+from render_policy import limit_categories
 
 color = pc.sequential.Mint
 
+@cached_figure()
 def dismissals(data, theme=None):
     ''' Distribution of Dismissal Types '''
     if theme is None:
@@ -37,6 +43,7 @@ def dismissals(data, theme=None):
 
     return fig
 
+@cached_figure()
 def boundaries(data, theme=None):
     ''' Distribution of Boundaries Scored '''
     if theme is None:
@@ -70,11 +77,14 @@ def boundaries(data, theme=None):
 
     return fig
 
+@cached_figure()
 def batsman_perf(data, theme=None):
     ''' Batsman Performance: Runs and Strike Rate '''
     if theme is None:
         theme = color
 
+    data = limit_categories(data, 'batsman', 'r', {'r': 'sum', 'b': 'sum'}, rates={'sr': ('r', 'b', 100)})
+
     fig = go.Figure()
 
     fig.add_trace(
@@ -123,11 +133,17 @@ def batsman_perf(data, theme=None):
 
     return fig
 
+@cached_figure()
 def bowler_perf(data, theme=None):
     ''' Bowler Performance: Runs Conceded including Extras and Economy Rate '''
     if theme is None:
         theme = color
 
+    data = limit_categories(
+        data.assign(balls=overs_to_balls(data['o'].to_numpy())), 'bowler', 'r',
+        {'r': 'sum', 'extras': 'sum', 'balls': 'sum'}, rates={'eco': ('r', 'balls', 6)}
+    )
+
     fig = go.Figure()
 
     fig.add_trace(
@@ -190,13 +206,26 @@ def bowler_perf(data, theme=None):
 
     return fig
 
-def fielder_perf(data, theme=None):
-    ''' Fielder Performance: Catches by Catcher vs Batsman '''
+@cached_figure()
+def fielder_perf(data, theme=None, mode='bars', limit=None):
+    '''
+    Fielder Performance: Catches by Catcher vs Batsman. mode='bars' draws one
+    bar trace per batsman; 'heatmap' and 'stacked' draw the same matrix as a
+    single trace, for season-wide views over hundreds of batsmen. 'stacked'
+    keeps the `limit` catchers with most catches and folds the rest.
+    '''
     if theme is None:
         theme = color
 
     catch_df = data.groupby(['catcher', 'batsman']).size().reset_index(name='catches')
 
+    if mode == 'heatmap':
+        return _fielder_heatmap(catch_df, theme)
+    if mode == 'stacked':
+        return _fielder_stacked(catch_df, theme, limit)
+    if mode != 'bars':
+        raise ValueError(f'Unknown fielder_perf mode: {mode}')
+
     pivot_df = catch_df.pivot(index='catcher', columns='batsman', values='catches').fillna(0)
 
     fig = go.Figure()
@@ -212,6 +241,11 @@ def fielder_perf(data, theme=None):
             )
         )
 
+    _fielder_layout(fig)
+    return fig
+
+def _fielder_layout(fig):
+    ''' Shared layout of the fielder charts '''
     fig.update_layout(
         title = 'Catches by Fielder (catcher) vs Batsman',
         xaxis_title = 'Catcher',
@@ -228,4 +262,86 @@ def fielder_perf(data, theme=None):
         plot_bgcolor = 'rgba(0,0,0,0)'
     )
 
+def _fielder_heatmap(catch_df, theme):
+    ''' Catcher x batsman matrix as one heatmap; empty cells are left blank '''
+    pivot_df = catch_df.pivot(index='catcher', columns='batsman', values='catches')
+
+    fig = go.Figure(
+        go.Heatmap(
+            z = pivot_df.to_numpy(),
+            x = pivot_df.columns,
+            y = pivot_df.index,
+            colorscale = [[i / (len(theme) - 1), c] for i, c in enumerate(theme)],
+            hoverongaps = False,
+            colorbar = dict(title = 'Catches'),
+            hovertemplate = 'Catcher: %{y}<br>Batsman: %{x}<br>Catches: %{z}<extra></extra>'
+        )
+    )
+
+    fig.update_layout(
+        title = 'Catches by Fielder (catcher) vs Batsman',
+        xaxis_title = 'Batsman',
+        yaxis_title = 'Catcher',
+        plot_bgcolor = 'rgba(0,0,0,0)'
+    )
+    return fig
+
+def _fielder_stacked(catch_df, theme, limit=None):
+    '''
+    Catcher x batsman segments as one bar trace, each offset by the catches
+    below it. Only pairs that occurred are drawn; catchers beyond the top
+    `limit` share one "Others" segment.
+    '''
+    catch_df = catch_df[catch_df['catches'] > 0].astype({'catcher': object, 'batsman': object})
+    per_catcher = catch_df.groupby('catcher', sort=True)['catches'].sum().reset_index()
+    kept = limit_categories(per_catcher, 'catcher', 'catches', {'catches': 'sum'}, limit=limit)
+    segments = catch_df[catch_df['catcher'].isin(kept['catcher'])]
+    segments = segments.sort_values(['catcher', 'batsman'], kind='stable')
+    if len(kept) < len(per_catcher):
+        others = kept.iloc[-1]
+        segments = pd.concat([segments, pd.DataFrame({
+            'catcher': [others['catcher']], 'batsman': ['Others'], 'catches': [others['catches']]
+        })], ignore_index=True)
+    base = segments.groupby('catcher')['catches'].cumsum() - segments['catches']
+    catcher_no = segments['catcher'].ne(segments['catcher'].shift()).cumsum() - 1
+
+    fig = go.Figure(
+        go.Bar(
+            x = segments['catcher'],
+            y = segments['catches'],
+            base = base,
+            customdata = segments['batsman'],
+            marker_color = [theme[i % len(theme)] for i in catcher_no],
+            marker_line_width = 0.5,
+            hovertemplate = 'Batsman: %{customdata}<extra></extra>'
+        )
+    )
+
+    _fielder_layout(fig)
     return fig
+
+def _dataset_version():
+    ''' Version of the shared dataset the archive charts read '''
+    return current().version
+
+@cached_figure(_dataset_version)
+def archive_fielders(season=None, theme=None, limit=None):
+    '''
+    Catches of the whole archive, or of one season, as stacked catcher bars:
+    the payload grows with the catcher-batsman pairs that occurred, not with
+    their product. Cached on the dataset version, so the catch rows are not
+    hashed on every rerun.
+    '''
+    return fielder_perf.uncached(catch_rows(season), theme, mode='stacked', limit=limit)
+
+def innings_views(batting, bowling):
+    ''' Every chart of one innings panel, keyed by view name '''
+    dismissal_counts = batting['dismissal'].value_counts()
+    boundaries_count = batting.groupby('batsman')[['4s', '6s']].sum().reset_index()
+    return {
+        'dismissals': dismissals(dismissal_counts),
+        'boundaries': boundaries(boundaries_count),
+        'batsman': batsman_perf(batting),
+        'bowler': bowler_perf(bowling),
+        'fielder': fielder_perf(batting)
+    }
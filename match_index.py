@@ -0,0 +1,112 @@
+''' Match Selection Index Keyed by MatchID '''
+import numpy as np
+import pandas as pd
+from dataset import current
+from venues import at_venue, venue_key
+
+# Initialization
+_indexes = {}
+
+
+def _lookup(values):
+    ''' Sorted distinct values and the position of each input value among them '''
+    positions, uniques = pd.factorize(pd.Series(values), sort=True)
+    return pd.Index(uniques), positions
+
+
+class MatchIndex:
+    '''
+    Fixtures keyed by MatchID. Labels, ids and metadata are resolved through
+    dicts; date, team and venue filters are array masks over the whole list.
+    '''
+
+    def __init__(self, match_list):
+        frame = match_list.drop(columns=['Unnamed: 0'], errors='ignore')
+        frame = frame.set_index('MatchID', drop=False, verify_integrity=True)
+        self.frame = frame
+        self.ids = frame['MatchID'].to_numpy(dtype=object)
+
+        # Repeat fixtures share date and name; the match number tells them apart
+        labels = frame['MatchDate'] + ', ' + frame['MatchName']
+        repeated = labels.duplicated(keep=False)
+        labels[repeated] += ' (Match ' + frame['MatchNumber'][repeated].astype(str) + ')'
+        repeated = labels.duplicated(keep=False)
+        labels[repeated] += ' [' + frame['MatchID'][repeated] + ']'
+        self.labels = labels.to_numpy(dtype=object)
+
+        self._label_of = dict(zip(self.ids, self.labels))
+        self._id_of = dict(zip(self.labels, self.ids))
+        self._position = dict(zip(self.ids, range(len(self.ids))))
+
+        self.dates = pd.to_datetime(frame['MatchDate']).to_numpy(dtype='datetime64[D]')
+
+        sides = frame['MatchName'].str.split(' vs ', n=1, expand=True)
+        self._teams, positions = _lookup(np.concatenate([sides[0].to_numpy(), sides[1].to_numpy()]))
+        self._team1, self._team2 = np.split(positions, 2)
+
+        # Spellings of one venue share its normalized key; the latest spelling is listed
+        venues = frame['MatchVenue']
+        self._spellings, self._venue = _lookup(venues.to_numpy())
+        listed = venues.groupby(venues.map(venue_key)).last()
+        self._venues = pd.Index(sorted(listed))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, match_id):
+        return match_id in self._position
+
+    def label(self, match_id):
+        ''' Selector label of a match '''
+        return self._label_of[match_id]
+
+    def match_id(self, label):
+        ''' MatchID of a selector label '''
+        return self._id_of[label]
+
+    def info(self, match_id):
+        ''' Fixture row of a match as a dict '''
+        return self.frame.iloc[self._position[match_id]].to_dict()
+
+    def teams(self):
+        ''' Teams appearing in the fixtures, sorted '''
+        return self._teams.tolist()
+
+    def venues(self):
+        ''' Venues appearing in the fixtures, sorted '''
+        return self._venues.tolist()
+
+    def date_range(self):
+        ''' First and last match day '''
+        if not len(self.dates):
+            return None, None
+        return self.dates.min().item(), self.dates.max().item()
+
+    def filter(self, team=None, venue=None, start=None, end=None):
+        '''
+        MatchIDs, in fixture order, of matches involving a team, played at a
+        venue (full name or city) and/or within a date range, inclusive
+        '''
+        mask = np.ones(len(self.ids), dtype=bool)
+        if team is not None:
+            code = self._teams.get_indexer([team.replace('_', ' ')])[0]
+            mask &= ((self._team1 == code) | (self._team2 == code)) & (code >= 0)
+        if venue is not None:
+            codes = [code for code, name in enumerate(self._spellings) if at_venue(name, venue)]
+            mask &= np.isin(self._venue, codes)
+        if start is not None:
+            mask &= self.dates >= np.datetime64(pd.Timestamp(start).date(), 'D')
+        if end is not None:
+            mask &= self.dates <= np.datetime64(pd.Timestamp(end).date(), 'D')
+        return self.ids[mask]
+
+
+def match_index():
+    ''' Index of the shared dataset's fixture list, rebuilt when the dataset changes '''
+    data = current()
+    index = _indexes.get(data.version)
+    if index is None:
+        index = MatchIndex(data.table('match_list'))
+        _indexes.clear()
+        _indexes[data.version] = index
+    return index
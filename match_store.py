@@ -0,0 +1,282 @@
+''' Season-Partitioned Match Store with Incremental Ingestion '''
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from datastore import (
+    CACHE_DIR, load_frame, read_table, save_frame, snapshot, table_version
+)
+from encoding import encode_columns
+
+# Initialization
+# Each snapshot has its own manifest; season partitions are immutable files shared between them
+STORE_DIR = os.path.join(CACHE_DIR, 'matches')
+TEAM_COLUMNS = ['Team1', 'Team2', 'tossWinner', 'matchWinner']
+
+_lock = threading.RLock()
+_state = {'manifest': None, 'partitions': {}}
+
+
+def snapshot_digest(current):
+    ''' Content digest of a snapshot's two source files '''
+    digest = hashlib.sha256()
+    for filename in (current.match_info, current.match_list):
+        digest.update(table_version(filename).encode('ascii'))
+    return digest.hexdigest()
+
+
+def snapshot_frame(current):
+    ''' Joined matches of a snapshot, without CSV index columns, with a season key and team codes '''
+    match_info = read_table(current.match_info)
+    match_list = read_table(current.match_list)
+    match_info = match_info.loc[:, ~match_info.columns.str.startswith('Unnamed')]
+    match_list = match_list.loc[:, ~match_list.columns.str.startswith('Unnamed')]
+    matches = pd.merge(match_info, match_list, left_on='id', right_on='MatchID', how='inner')
+    matches['season'] = matches.MatchDate.str.slice(0, 4).astype(int)
+    return encode_columns(matches, TEAM_COLUMNS, 'team')
+
+
+def batting_team(label):
+    ''' Team names of innings labels such as "Punjab Kings Inning 1" '''
+    return label.astype(object).str.replace(r'\s+Inning\s+\d+$', '', regex=True)
+
+
+def batting_order(matches):
+    '''
+    Sides batting first and second in each match, from the toss; from the
+    first innings label when the toss is missing. The labels are not trusted
+    otherwise: some dumps have them swapped.
+    '''
+    team1 = matches['Team1'].astype(object).to_numpy()
+    team2 = matches['Team2'].astype(object).to_numpy()
+    toss_winner = matches['tossWinner'].astype(object).to_numpy()
+    choice = matches['tossChoice'].astype(object).to_numpy()
+    from_toss = np.where(choice == 'bat', toss_winner, np.where(toss_winner == team1, team2, team1))
+    known = pd.notna(toss_winner) & np.isin(choice, ['bat', 'bowl'])
+    first = np.where(known, from_toss, batting_team(matches['Innings1']).to_numpy())
+    swapped = first == team2
+    return np.where(swapped, team2, team1), np.where(swapped, team1, team2)
+
+
+def row_hashes(frame):
+    ''' Per-match content hash, insensitive to int/float re-typing between dumps '''
+    canonical = frame[sorted(frame.columns)].copy()
+    for column in canonical.columns:
+        if pd.api.types.is_bool_dtype(canonical[column]):
+            canonical[column] = canonical[column].astype(str)
+        elif pd.api.types.is_numeric_dtype(canonical[column]):
+            canonical[column] = canonical[column].astype('float64')
+    hashed = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    return [format(int(h), '016x') for h in hashed]
+
+
+def _manifest_file(tag):
+    ''' Path of one snapshot's manifest '''
+    return os.path.join(STORE_DIR, f'manifest-{tag}.json')
+
+
+def _partition_file(season, version):
+    ''' Path of one season partition as written at a store revision '''
+    return os.path.join(STORE_DIR, f'season={season}-{version}.npz')
+
+
+def _read_partition(season, version):
+    ''' One season partition from disk, with team columns on the current shared codes '''
+    return encode_columns(load_frame(_partition_file(season, version)), TEAM_COLUMNS, 'team')
+
+
+def _read_manifest(path):
+    ''' Stored manifest, or None when missing or unreadable '''
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _base_manifest():
+    ''' Most recently written snapshot manifest, or an empty one '''
+    stored = glob.glob(os.path.join(STORE_DIR, 'manifest-*.json'))
+    for path in sorted(stored, key=os.path.getmtime, reverse=True):
+        manifest = _read_manifest(path)
+        if manifest is not None:
+            return manifest
+    return {'snapshot': None, 'rows': {}, 'partitions': {}, 'scopes': {}, 'version': None}
+
+
+def _write_manifest(tag, manifest):
+    ''' Atomically replace a snapshot's manifest '''
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = _manifest_file(tag)
+    tmp_file = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, path)
+
+
+def _prune(superseded):
+    ''' Delete superseded partition files that no snapshot manifest refers to any more '''
+    referenced = set()
+    for path in glob.glob(os.path.join(STORE_DIR, 'manifest-*.json')):
+        manifest = _read_manifest(path) or {'partitions': {}}
+        referenced.update(manifest['partitions'].items())
+    for season, version in superseded - referenced:
+        try:
+            os.remove(_partition_file(season, version))
+        except OSError:
+            pass
+
+
+def _partition(season):
+    ''' One season partition, read from disk at most once per revision '''
+    manifest = _state['manifest']
+    key = (season, manifest['partitions'][str(season)])
+    if key not in _state['partitions']:
+        frame = _read_partition(*key)
+        stale = [k for k in _state['partitions'] if k[0] == season]
+        for k in stale:
+            del _state['partitions'][k]
+        _state['partitions'][key] = frame
+    return _state['partitions'][key]
+
+
+def ingest(current=None):
+    '''
+    Diff a snapshot by match id against the store and rewrite only the seasons
+    with new, changed or removed matches; other seasons keep sharing their
+    partition files. The result is exactly the snapshot. Returns what was touched.
+    '''
+    with _lock:
+        current = current or snapshot()
+        digest = snapshot_digest(current)
+        report = {
+            'snapshot': current.version, 'new': [], 'changed': [], 'removed': [], 'seasons': [], 'scopes': []
+        }
+        # Diffed against the snapshot's own earlier manifest, else the newest one stored
+        own = _read_manifest(_manifest_file(current.version))
+        if own is not None and own['snapshot'] == digest:
+            _state['manifest'] = own
+            return report
+        manifest = own or _base_manifest()
+
+        frame = snapshot_frame(current)
+        hashes = np.array(row_hashes(frame), dtype=object)
+        stored = manifest['rows']
+        previous = np.array([stored.get(i, [None, None])[1] for i in frame['id']], dtype=object)
+        touched = frame[hashes != previous]
+        present = set(frame['id'])
+        removed = {i: season for i, (season, _) in stored.items() if i not in present}
+
+        report['new'] = [i for i in touched['id'] if i not in stored]
+        report['changed'] = [i for i in touched['id'] if i in stored]
+        report['removed'] = sorted(removed)
+
+        version = hashlib.sha256()
+        version.update((manifest['version'] or '').encode('ascii'))
+        version.update(digest.encode('ascii'))
+        version = version.hexdigest()[:16]
+
+        # Teams of removed matches, from the partitions they are leaving
+        teams = set(pd.unique(touched[['Team1', 'Team2']].values.ravel()))
+        for season in set(removed.values()):
+            gone = _read_partition(season, manifest['partitions'][str(season)])
+            gone = gone[gone['id'].isin(removed)]
+            teams.update(pd.unique(gone[['Team1', 'Team2']].values.ravel()))
+
+        rewrite = set(touched['season'].unique()) | set(removed.values())
+        partitions = {}
+        for season, rows in frame.groupby('season'):
+            key = str(season)
+            if season not in rewrite and key in manifest['partitions']:
+                partitions[key] = manifest['partitions'][key]
+                continue
+            rows = rows.sort_values(['MatchDateTime', 'MatchNumber'], kind='stable')
+            save_frame(_partition_file(season, version), rows.reset_index(drop=True))
+            partitions[key] = version
+        report['seasons'] = sorted(int(s) for s in rewrite)
+
+        scopes = set()
+        if rewrite:
+            scopes.add('series')
+            scopes.update(f'season:{s}' for s in rewrite)
+            scopes.update(f'team:{t}' for t in teams)
+            scopes.update(f'match:{i}' for i in list(touched['id']) + report['removed'])
+        manifest = {
+            'snapshot': digest,
+            'rows': dict(zip(frame['id'], ([int(s), h] for s, h in zip(frame['season'], hashes)))),
+            'partitions': partitions,
+            'scopes': {**manifest['scopes'], **{scope: version for scope in scopes}},
+            'version': version if scopes else manifest['version']
+        }
+        report['scopes'] = sorted(scopes)
+
+        _write_manifest(current.version, manifest)
+        if own is not None:
+            _prune(set(own['partitions'].items()) - set(partitions.items()))
+        _state['manifest'] = manifest
+        return report
+
+
+def refresh():
+    ''' Ingest the snapshot in use if it differs from the one loaded '''
+    with _lock:
+        manifest = _state['manifest']
+        if manifest is None or manifest['snapshot'] != snapshot_digest(snapshot()):
+            ingest()
+        return _state['manifest']
+
+
+def seasons():
+    ''' Seasons of the snapshot in use '''
+    return sorted(int(season) for season in refresh()['partitions'])
+
+
+def load_matches(seasons=None):
+    ''' Joined matches of the snapshot in use: all seasons, or only the partitions asked for '''
+    with _lock:
+        manifest = refresh()
+        available = sorted(int(s) for s in manifest['partitions'])
+        wanted = available if seasons is None else [s for s in available if s in set(seasons)]
+        if not wanted:
+            return _partition(available[0]).iloc[0:0].copy() if available else pd.DataFrame()
+        # Partitions read before the team dictionary grew are brought onto its current codes
+        parts = [encode_columns(_partition(s).copy(deep=False), TEAM_COLUMNS, 'team') for s in wanted]
+    return pd.concat(parts, ignore_index=True)
+
+
+def dataset_version():
+    ''' Revision of the store; changes whenever any match is added or changed '''
+    return refresh()['version']
+
+
+def scope_version(scope):
+    ''' Revision at which a scope (series, season:<y>, team:<name>, match:<id>) last changed '''
+    return refresh()['scopes'].get(scope)
+
+
+def main():
+    ''' Command line entry point '''
+    parser = argparse.ArgumentParser(description=__doc__.strip(" '"))
+    parser.add_argument('--version', default=None, help='snapshot tag to ingest, default latest')
+    args = parser.parse_args()
+
+    from catalog import resolve  # pylint: disable=import-outside-toplevel
+    from datastore import DATA_DIR  # pylint: disable=import-outside-toplevel
+    report = ingest(resolve(DATA_DIR, args.version or 'latest'))
+    print(json.dumps({
+        'snapshot': report['snapshot'],
+        'new': len(report['new']),
+        'changed': len(report['changed']),
+        'removed': len(report['removed']),
+        'seasons': report['seasons'],
+        'scopes': len(report['scopes'])
+    }))
+
+
+if __name__ == '__main__':
+    main()
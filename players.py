@@ -0,0 +1,283 @@
+''' Player Career and Season Totals Streamed from Scorecards '''
+import hashlib
+
+import numpy as np
+import pandas as pd
+from datastore import cached_frames
+from encoding import encode_columns
+from match_store import refresh
+from scorecards import match_id_of, parse_files, player_ref, scorecard_files
+
+# Initialization
+COUNTERS = [
+    'matches', 'innings', 'runs', 'balls', 'fours', 'sixes', 'outs', 'highest',
+    'bowling_innings', 'balls_bowled', 'maidens', 'runs_conceded', 'wickets',
+    'wides', 'no_balls', 'catches', 'stumpings', 'runouts'
+]
+TOTALS_COLUMNS = ['player_id', 'season', 'name'] + COUNTERS
+FOLDED_COLUMNS = ['match_id', 'season']
+NOT_OUT = {None, 'injury'}
+UNKNOWN_SEASON = 0
+
+_stats = {}
+
+
+def overs_to_balls(overs):
+    ''' Legal balls in cricket overs notation, e.g. 3.2 -> 20, of a number or an array '''
+    if np.ndim(overs):
+        overs = np.asarray(overs, dtype='float64')
+        whole = np.floor(overs)
+        return (whole * 6 + np.round((overs - whole) * 10)).astype('int64')
+    whole = int(overs)
+    return whole * 6 + int(round((overs - whole) * 10))
+
+
+def balls_to_overs(balls):
+    ''' Cricket overs notation of a ball count, e.g. 20 -> 3.2 '''
+    balls = np.asarray(balls, dtype='int64')
+    return balls // 6 + (balls % 6) / 10
+
+
+def _row(accumulator, player_id, season, name):
+    '''
+    Counter row of a player in a season, created on first sight. Of the names
+    a player appears under, the fullest is kept, so the order scorecards are
+    folded in does not matter.
+    '''
+    key = (player_id, season)
+    name = name.strip() if isinstance(name, str) else name
+    row = accumulator.get(key)
+    if row is None:
+        row = accumulator[key] = [name] + [0] * len(COUNTERS)
+    elif name and (len(name), name) > (len(row[0] or ''), row[0] or ''):
+        row[0] = name
+    return row
+
+
+def fold_scorecard(accumulator, innings_list, season):
+    ''' Add one match's batting, bowling and catching records to the running totals '''
+    index = {counter: i + 1 for i, counter in enumerate(COUNTERS)}
+    played = set()
+
+    for inn in innings_list:
+        for record in inn.get('batting', []):
+            name, player_id = player_ref(record, 'batsman')
+            if player_id is None:
+                continue
+            row = _row(accumulator, player_id, season, name)
+            runs = record.get('r', 0)
+            row[index['innings']] += 1
+            row[index['runs']] += runs
+            row[index['balls']] += record.get('b', 0)
+            row[index['fours']] += record.get('4s', 0)
+            row[index['sixes']] += record.get('6s', 0)
+            row[index['outs']] += record.get('dismissal') not in NOT_OUT
+            row[index['highest']] = max(row[index['highest']], runs)
+            played.add(player_id)
+
+        for record in inn.get('bowling', []):
+            name, player_id = player_ref(record, 'bowler')
+            if player_id is None:
+                continue
+            row = _row(accumulator, player_id, season, name)
+            row[index['bowling_innings']] += 1
+            row[index['balls_bowled']] += overs_to_balls(record.get('o', 0))
+            row[index['maidens']] += record.get('m', 0)
+            row[index['runs_conceded']] += record.get('r', 0)
+            row[index['wickets']] += record.get('w', 0)
+            row[index['wides']] += record.get('wd', 0)
+            row[index['no_balls']] += record.get('nb', 0)
+            played.add(player_id)
+
+        for record in inn.get('catching', []):
+            name, player_id = player_ref(record, 'catcher')
+            if player_id is None:
+                continue
+            row = _row(accumulator, player_id, season, name)
+            row[index['catches']] += record.get('catch', 0) + record.get('cb', 0)
+            row[index['stumpings']] += record.get('stumped', 0)
+            row[index['runouts']] += record.get('runout', 0)
+            played.add(player_id)
+
+    for player_id in played:
+        accumulator[(player_id, season)][index['matches']] += 1
+
+
+def _to_accumulator(totals):
+    ''' Running totals keyed by (player_id, season) from a stored totals frame '''
+    keys = zip(totals['player_id'], totals['season'].astype(int))
+    values = totals[['name'] + COUNTERS].to_numpy(dtype=object).tolist()
+    return {(player_id, int(season)): row for (player_id, season), row in zip(keys, values)}
+
+
+def _to_frame(accumulator):
+    ''' Stored totals frame of the running totals '''
+    rows = [[player_id, season] + row for (player_id, season), row in accumulator.items()]
+    totals = pd.DataFrame(rows, columns=TOTALS_COLUMNS)
+    totals[COUNTERS] = totals[COUNTERS].astype('int64')
+    totals['season'] = totals['season'].astype('int64')
+    encode_columns(totals, ['player_id'], 'player')
+    return totals.sort_values(['player_id', 'season'], kind='stable').reset_index(drop=True)
+
+
+def _update(frames, sources, seasons):
+    '''
+    Stream new scorecard files into the stored totals, parsed chunk by chunk,
+    recording the season each match was folded under
+    '''
+    accumulator = _to_accumulator(frames['totals'])
+    folded = []
+    for path, innings_list, error in parse_files(sources):
+        if error is not None:
+            # Empty or truncated download; the match has no scorecard yet
+            continue
+        match_id = match_id_of(path)
+        season = seasons.get(match_id, [UNKNOWN_SEASON])[0]
+        fold_scorecard(accumulator, innings_list, season)
+        folded.append((match_id, season))
+    folded = pd.concat(
+        [frames['folded'], pd.DataFrame(folded, columns=FOLDED_COLUMNS)], ignore_index=True
+    )
+    folded['season'] = folded['season'].astype('int64')
+    return {'totals': _to_frame(accumulator), 'folded': folded}
+
+
+def _build(sources, seasons):
+    ''' Stream every scorecard file into fresh totals '''
+    empty = {
+        'totals': pd.DataFrame(columns=TOTALS_COLUMNS),
+        'folded': pd.DataFrame(columns=FOLDED_COLUMNS)
+    }
+    return _update(empty, sources, seasons)
+
+
+def _misfiled(frames, seasons):
+    '''
+    Whether any match was folded under a season the match store no longer
+    gives it, e.g. a scorecard that arrived before its match reached the store
+    '''
+    if 'folded' not in frames:
+        return True
+    folded = frames['folded']
+    current = [seasons.get(m, [UNKNOWN_SEASON])[0] for m in folded['match_id']]
+    return bool((folded['season'].to_numpy() != np.asarray(current, dtype='int64')).any())
+
+
+def _cached():
+    ''' Cache entry of the player totals, re-streamed when a match's season changed '''
+    # Resolved up front: the match store reads through the same cache lock
+    seasons = refresh()['rows']
+    return cached_frames(
+        'players', scorecard_files(),
+        lambda sources: _build(sources, seasons),
+        lambda frames, sources: _update(frames, sources, seasons),
+        lambda frames: _misfiled(frames, seasons)
+    )
+
+
+def totals():
+    '''
+    Raw counters per (player, season). Scorecards are folded in one at a time;
+    new files are added to the stored totals, and a changed or removed file
+    triggers a full re-stream.
+    '''
+    totals = _cached()['frames']['totals']
+    return encode_columns(totals.copy(deep=False), ['player_id'], 'player')
+
+
+def players_version():
+    ''' Content version of the player totals: the scorecards and the seasons they were folded under '''
+    entry = _cached()
+    digest = hashlib.sha256(entry['version'].encode('ascii'))
+    digest.update(pd.util.hash_pandas_object(entry['frames']['folded'], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def derive(counters):
+    ''' Rate statistics (SR, average, overs, economy) from summed counters '''
+    stats = counters.copy()
+    runs = stats['runs'].to_numpy(dtype=float)
+    balls = stats['balls'].to_numpy(dtype=float)
+    outs = stats['outs'].to_numpy(dtype=float)
+    bowled = stats['balls_bowled'].to_numpy(dtype=float)
+    conceded = stats['runs_conceded'].to_numpy(dtype=float)
+
+    def ratio(numerator, denominator):
+        return np.round(np.divide(
+            numerator, denominator, out=np.full_like(numerator, np.nan), where=denominator > 0
+        ), 2)
+
+    stats['strike_rate'] = ratio(runs * 100, balls)
+    stats['average'] = ratio(runs, outs)
+    stats['overs'] = balls_to_overs(stats['balls_bowled'])
+    stats['economy'] = ratio(conceded * 6, bowled)
+    stats['bowling_average'] = ratio(conceded, stats['wickets'].to_numpy(dtype=float))
+    return stats
+
+
+def _aggregate(frame, keys):
+    ''' Sum counters over keys, keeping the latest name and the best innings '''
+    grouped = frame.groupby(keys, sort=True, observed=True)
+    sums = grouped[[c for c in COUNTERS if c != 'highest']].sum()
+    sums.insert(0, 'name', grouped['name'].last())
+    sums.insert(sums.columns.get_loc('outs') + 1, 'highest', grouped['highest'].max())
+    return derive(sums)
+
+
+def _shared_totals():
+    ''' Player totals of the shared dataset, on the current player codes '''
+    from dataset import current  # pylint: disable=import-outside-toplevel
+    return encode_columns(current().table('player_totals'), ['player_id'], 'player')
+
+
+def _memoized(kind, compute):
+    ''' Derived table for the shared dataset's player totals, computed once per version '''
+    from dataset import current  # pylint: disable=import-outside-toplevel
+    version = current().version
+    key = (kind, version)
+    stats = _stats.get(key)
+    if stats is None:
+        stats = compute()
+        for k in [k for k in list(_stats) if k[1] != version]:
+            _stats.pop(k, None)
+        _stats[key] = stats
+    return stats
+
+
+def season_stats(season=None):
+    ''' Player statistics per season, or for one season '''
+    stats = _memoized('season', lambda: derive(_shared_totals().set_index(['player_id', 'season'])))
+    if season is None:
+        return stats
+    return stats.xs(season, level='season')
+
+
+def career():
+    ''' Career statistics of every player across all seasons '''
+    return _memoized('career', lambda: _aggregate(_shared_totals(), 'player_id'))
+
+
+def top_performers(metric, n=10, season=None, ascending=False, minimum=None):
+    '''
+    Players ranked by a statistic, for the career or one season. `minimum`
+    is an optional (counter, value) qualification, e.g. ('balls_bowled', 60).
+    '''
+    stats = career() if season is None else season_stats(season)
+    if minimum is not None:
+        counter, value = minimum
+        stats = stats[stats[counter] >= value]
+    stats = stats.dropna(subset=[metric])
+    return stats.sort_values(metric, ascending=ascending, kind='stable').head(n)
+
+
+def catch_rows(season=None):
+    ''' Batting rows of every catch in the archive, or in one season, from the shared dataset '''
+    from dataset import current  # pylint: disable=import-outside-toplevel
+    dataset = current()
+    batting = dataset.table('batting')
+    catches = batting[batting['catcher'].notna()]
+    if season is not None:
+        matches = dataset.table('matches')
+        in_season = matches.loc[matches['season'] == season, 'id']
+        catches = catches[catches['match_id'].isin(in_season).to_numpy()]
+    return catches.reset_index(drop=True)
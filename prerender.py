@@ -0,0 +1,238 @@
+''' Headless Pre-Render of Every Dashboard View '''
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import figure_cache
+from datastore import CACHE_DIR
+
+# Initialization
+BUNDLE_DIR = os.environ.get('IPL_PRERENDER_DIR', os.path.join(CACHE_DIR, 'prerender'))
+MANIFEST_NAME = 'manifest.json'
+TEAM_VIEWS = ['performance', 'toss_performance', 'sunburst', 'match_count', 'toss_choice']
+
+_state = {'checked': None, 'index': {}}
+
+
+# Views
+def view_tasks():
+    ''' Every view the dashboard can show, as (section, subject) tasks '''
+    # pylint: disable=import-outside-toplevel
+    from dataset import current
+    from kpis import innings_kpis
+
+    data = current()
+    teams = data.table('matches').Team1.astype(str).str.replace(' ', '_').unique().tolist()
+    innings = innings_kpis().reset_index()
+    complete = innings.groupby('match_id')['innings_no'].agg(lambda n: {1, 2} <= set(n))
+    matches = complete[complete].index.tolist()
+
+    return (
+        [('series', None)]
+        + [('team', team) for team in teams]
+        + [('match', match) for match in matches]
+    )
+
+
+def render_task(task):
+    '''
+    Render one view through the same cached builders the app calls. Returns
+    the figure cache entries it produced and the Series registry entries.
+    '''
+    # pylint: disable=import-outside-toplevel
+    import match_analysis
+    import series_analysis
+    import team_performance
+    from dataset import current
+    from scorecards import innings_data
+
+    section, subject = task
+    figure_cache.cache.clear()
+    series = []
+
+    if section == 'series':
+        version = current().scope('series')
+        for name in series_analysis.figure_names():
+            result = series_analysis.figure(name)
+            kind = 'table' if isinstance(result, pd.DataFrame) else 'figure'
+            payload = result.to_json(orient='table') if kind == 'table' else result.to_json()
+            series.append({'name': name, 'version': version, 'kind': kind, 'payload': payload})
+        match_analysis.archive_fielders()
+    elif section == 'team':
+        for name in TEAM_VIEWS:
+            getattr(team_performance, name)(subject)
+    else:
+        for innings_no in (1, 2):
+            _, batting, bowling = innings_data(subject, innings_no)
+            match_analysis.innings_views(batting, bowling)
+
+    return {'task': list(task), 'figures': figure_cache.cache.items(), 'series': series}
+
+
+def _init_worker():
+    ''' Unbounded figure cache in workers, so no rendered view is evicted '''
+    figure_cache.cache = figure_cache.FigureCache(maxsize=1 << 30)
+
+
+def render_all(workers=None):
+    ''' Render every view, across a process pool when more than one worker is asked for '''
+    tasks = view_tasks()
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker()
+        return [render_task(task) for task in tasks]
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        return list(pool.map(render_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+# Bundle
+def _file_name(section, subject, index):
+    ''' Stable artifact file name of one rendered entry '''
+    label = f'{section}-{subject}' if subject else section
+    return f"{label.replace(' ', '_')}-{index:02d}"
+
+
+def write_bundle(results, directory=BUNDLE_DIR, html=False):
+    ''' Write every artifact and the manifest that maps cache keys to files '''
+    # pylint: disable=import-outside-toplevel
+    from dataset import source_versions
+
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for result in results:
+        section, subject = result['task']
+        artifacts = [('figure', key, payload) for key, payload in result['figures']]
+        artifacts += [('series', entry, entry.pop('payload')) for entry in result['series']]
+        for index, (kind, key, payload) in enumerate(artifacts):
+            name = _file_name(section, subject, index)
+            with open(os.path.join(directory, f'{name}.json'), 'w', encoding='utf-8') as f:
+                f.write(payload)
+            entry = {
+                'section': section,
+                'subject': subject,
+                'kind': kind,
+                'key': key,
+                'file': f'{name}.json',
+                'bytes': len(payload),
+                'sha256': hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            }
+            if html and (kind == 'figure' or key['kind'] == 'figure'):
+                figure_cache.as_figure(payload).write_html(
+                    os.path.join(directory, f'{name}.html'), include_plotlyjs='cdn'
+                )
+                entry['html'] = f'{name}.html'
+            entries.append(entry)
+
+    manifest = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'versions': list(source_versions()),
+        'entries': entries
+    }
+    tmp_file = os.path.join(directory, f'{MANIFEST_NAME}.{os.getpid()}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+def _as_key(value):
+    ''' Figure cache key from its JSON form (lists back to tuples) '''
+    if isinstance(value, list):
+        return tuple(_as_key(v) for v in value)
+    return value
+
+
+def _read_artifact(key):
+    ''' Payload of a bundled figure, read from disk on a figure cache miss, or None '''
+    path = _state['index'].get(key)
+    if path is None:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def preload(directory=BUNDLE_DIR, versions=None):
+    '''
+    Serve views from a bundle written for the current sources. Only the
+    manifest is read: figures are indexed by cache key and read from disk
+    when the figure cache misses them, so memory stays bounded by the cache.
+    The few Series entries are loaded into the Series registry up front. A
+    stale or missing bundle is ignored, and a bundle already indexed is not
+    read again. Returns the number of entries indexed.
+    '''
+    # pylint: disable=import-outside-toplevel
+    import series_analysis
+    from dataset import source_versions
+
+    manifest_file = os.path.join(directory, MANIFEST_NAME)
+    versions = list(versions or source_versions())
+    try:
+        checked = (directory, versions, os.stat(manifest_file).st_mtime_ns)
+    except OSError:
+        return 0
+    if _state['checked'] == checked:
+        return 0
+    _state['checked'] = checked
+
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if manifest['versions'] != versions:
+        return 0
+
+    index = {}
+    for entry in manifest['entries']:
+        key = entry['key']
+        path = os.path.join(directory, entry['file'])
+        if entry['kind'] == 'figure':
+            index[_as_key(key)] = path
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = f.read()
+        if key['kind'] == 'figure':
+            series_analysis.preload(key['name'], key['version'], figure_cache.as_figure(payload))
+        else:
+            table = pd.read_json(io.StringIO(payload), orient='table')
+            series_analysis.preload(key['name'], key['version'], table)
+    _state['index'] = index
+    figure_cache.fallback['loader'] = _read_artifact
+    return len(manifest['entries'])
+
+
+def main():
+    ''' Command line entry point '''
+    parser = argparse.ArgumentParser(description=__doc__.strip(" '"))
+    parser.add_argument('--output', default=BUNDLE_DIR, help='bundle directory')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='render processes, default all cores')
+    parser.add_argument('--html', action='store_true',
+                        help='also write a standalone HTML file per chart')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = render_all(args.workers)
+    manifest = write_bundle(results, args.output, args.html)
+    print(json.dumps({
+        'views': len(results),
+        'artifacts': len(manifest['entries']),
+        'bytes': sum(entry['bytes'] for entry in manifest['entries']),
+        'seconds': round(time.perf_counter() - start, 2),
+        'output': args.output
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+''' Rendering Policy for Large Chart Series '''
+import os
+
+import pandas as pd
+
+# Initialization
+# Categorical bar series longer than this keep their top entries and fold the rest
+MAX_CATEGORIES = int(os.environ.get('IPL_MAX_CATEGORIES', 40))
+
+
+def limit_categories(data, label, order, agg, limit=None, other='Others', rates=None):
+    '''
+    Keep the `limit` rows with the largest `order` value, in their original
+    order, and fold the remaining rows into one trailing row aggregated with
+    `agg` (column -> pandas aggregation). Rates are not averaged: `rates`
+    maps a column to (numerator, denominator, scale), recomputed from the
+    folded sums. Small frames are returned as is.
+    '''
+    limit = MAX_CATEGORIES if limit is None else limit
+    if limit <= 0 or len(data) <= limit:
+        return data
+
+    data = data.reset_index(drop=True)
+    keep = data[order].rank(method='first', ascending=False) <= limit
+    rest = data[~keep]
+
+    folded = {column: rest[column].agg(how) for column, how in agg.items()}
+    for column, (numerator, denominator, scale) in (rates or {}).items():
+        total = folded[denominator]
+        folded[column] = folded[numerator] * scale / total if total else float('nan')
+    folded[label] = f'{other} ({len(rest)})'
+    return pd.concat([data[keep], pd.DataFrame([folded])], ignore_index=True)
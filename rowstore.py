@@ -0,0 +1,160 @@
+''' Memory-Mapped Scorecard Rows as Fixed-Width Structured Arrays '''
+import json
+import os
+import threading
+
+import numpy as np
+from datastore import CACHE_DIR
+from encoding import code_of, codes, dictionary_size, fingerprint
+from scorecards import load_tables, scorecard_version
+
+# Initialization
+ROW_DIR = os.path.join(CACHE_DIR, 'rows')
+META_FILE = os.path.join(ROW_DIR, 'meta.json')
+
+BATTING_DTYPE = np.dtype([
+    ('match', '<i4'), ('innings', 'i1'), ('position', 'i1'),
+    ('batsman', '<i4'), ('bowler', '<i4'), ('catcher', '<i4'), ('out', '?'),
+    ('r', '<i2'), ('b', '<i2'), ('4s', '<i2'), ('6s', '<i2'), ('sr', '<f4')
+])
+BOWLING_DTYPE = np.dtype([
+    ('match', '<i4'), ('innings', 'i1'), ('position', 'i1'), ('bowler', '<i4'),
+    ('o', '<f4'), ('m', '<i2'), ('r', '<i2'), ('w', '<i2'),
+    ('nb', '<i2'), ('wd', '<i2'), ('extras', '<i2'), ('eco', '<f4')
+])
+DTYPES = {'batting': BATTING_DTYPE, 'bowling': BOWLING_DTYPE}
+VALUE_FIELDS = {
+    'batting': ['r', 'b', '4s', '6s', 'sr'],
+    'bowling': ['o', 'm', 'r', 'w', 'nb', 'wd', 'extras', 'eco']
+}
+# Stored rows written with another layout are recompiled
+LAYOUT = {table: repr(dtype) for table, dtype in DTYPES.items()}
+PLAYER_FIELDS = {
+    'batting': {'batsman': 'batsman_id', 'bowler': 'bowler_id', 'catcher': 'catcher_id'},
+    'bowling': {'bowler': 'bowler_id'}
+}
+
+_lock = threading.Lock()
+_open = {}
+
+
+def _records(table, frame):
+    ''' Structured array of one flattened table, ordered by (match code, innings, position) '''
+    dtype = DTYPES[table]
+    records = np.zeros(len(frame), dtype=dtype)
+    records['match'] = codes(frame['match_id'], 'match')
+    records['innings'] = frame['innings_no'].to_numpy()
+    records['position'] = frame['position'].to_numpy()
+    for field, column in PLAYER_FIELDS[table].items():
+        records[field] = codes(frame[column], 'player')
+    if table == 'batting':
+        records['out'] = frame['dismissal'].notna().to_numpy()
+    for field in VALUE_FIELDS[table]:
+        records[field] = frame[field].fillna(0).to_numpy()
+    return np.sort(records, order=['match', 'innings', 'position'], kind='stable')
+
+
+def _file(table):
+    ''' Path of one table's .npy file '''
+    return os.path.join(ROW_DIR, f'{table}.npy')
+
+
+def _read_meta():
+    ''' Stored row store metadata, or None '''
+    try:
+        with open(META_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _valid(meta, version):
+    ''' Whether stored rows match the scorecards and the codes are still assigned the same way '''
+    if meta is None or meta['version'] != version or meta.get('layout') != LAYOUT:
+        return False
+    for kind, (length, digest) in meta['dictionaries'].items():
+        if fingerprint(kind, length) != digest:
+            return False
+    return True
+
+
+def _source(dataset):
+    ''' Scorecard version and tables to compile: the shared dataset's, or the archive's '''
+    if dataset is None:
+        return scorecard_version(), load_tables
+    return dataset.scope('scorecards'), lambda: {table: dataset.table(table) for table in DTYPES}
+
+
+def write_rows(dataset=None):
+    ''' Compile the flattened batting and bowling tables into .npy files '''
+    version, load = _source(dataset)
+    tables = load()
+    os.makedirs(ROW_DIR, exist_ok=True)
+    for table in DTYPES:
+        records = _records(table, tables[table].reset_index(drop=True))
+        tmp_file = f'{_file(table)}.{os.getpid()}.tmp.npy'
+        np.save(tmp_file, records)
+        os.replace(tmp_file, _file(table))
+
+    sizes = {kind: dictionary_size(kind) for kind in ('player', 'match')}
+    meta = {
+        'version': version,
+        'layout': LAYOUT,
+        'dictionaries': {kind: [size, fingerprint(kind, size)] for kind, size in sizes.items()}
+    }
+    tmp_file = f'{META_FILE}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_file, META_FILE)
+    return meta
+
+
+def open_rows(dataset=None):
+    '''
+    Batting and bowling rows of the archive, or of a shared dataset, mapped
+    read-only from disk. Every process that opens the same files shares one
+    page-cached copy; nothing is read into private memory until a slice is touched.
+    '''
+    version = _source(dataset)[0]
+    with _lock:
+        rows = _open.get(version)
+        if rows is None:
+            meta = _read_meta()
+            if not _valid(meta, version):
+                write_rows(dataset)
+            rows = {table: np.load(_file(table), mmap_mode='r') for table in DTYPES}
+            _open.clear()
+            _open[version] = rows
+        return rows
+
+
+def match_rows(table, match_id, innings_no=None, dataset=None):
+    ''' Rows of a match, or one innings of it, as a view into the mapped file '''
+    rows = open_rows(dataset)[table]
+    code = code_of(match_id, 'match')
+    if code < 0:
+        return rows[0:0]
+    start, stop = np.searchsorted(rows['match'], [code, code + 1])
+    rows = rows[start:stop]
+    if innings_no is not None:
+        start, stop = np.searchsorted(rows['innings'], [innings_no, innings_no + 1])
+        rows = rows[start:stop]
+    return rows
+
+
+def innings_sums(table, fields, dataset=None):
+    ''' Per-innings sums of numeric fields, computed on the mapped rows '''
+    rows = open_rows(dataset)[table]
+    dtype = [('match', '<i4'), ('innings', 'i1')] + [(field, '<i8') for field in fields]
+    if not len(rows):
+        return np.zeros(0, dtype=dtype)
+    boundary = np.flatnonzero(
+        (rows['match'][1:] != rows['match'][:-1]) | (rows['innings'][1:] != rows['innings'][:-1])
+    ) + 1
+    starts = np.concatenate([[0], boundary])
+    sums = np.zeros(len(starts), dtype=dtype)
+    sums['match'] = rows['match'][starts]
+    sums['innings'] = rows['innings'][starts]
+    for field in fields:
+        sums[field] = np.add.reduceat(rows[field].astype('int64'), starts)
+    return sums
@@ -0,0 +1,276 @@
+''' Consolidated Innings Tables from Scorecard Files '''
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from datastore import cached_frames, data_path
+from encoding import encode_columns, generation
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Initialization
+SCORECARD_DIR = data_path('scorecard')
+PARSE_WORKERS = int(os.environ.get('IPL_PARSE_WORKERS', os.cpu_count() or 1))
+CHUNK_SIZE = 64
+# Below this many files, starting the pool costs more than it saves
+PARALLEL_MIN_FILES = 2048
+# Reads reuse the compiled archive for this long before the files are globbed and checked again
+REFRESH_SECONDS = float(os.environ.get('IPL_REFRESH_SECONDS', 30))
+KEYS = ['match_id', 'innings_no']
+
+BATTING_COLUMNS = [
+    'match_id', 'innings_no', 'position', 'batsman', 'batsman_id', 'dismissal',
+    'bowler', 'bowler_id', 'catcher', 'catcher_id', 'dismissal-text',
+    'r', 'b', '4s', '6s', 'sr'
+]
+BOWLING_COLUMNS = [
+    'match_id', 'innings_no', 'position', 'bowler', 'bowler_id',
+    'o', 'm', 'r', 'w', 'nb', 'wd', 'eco', 'extras'
+]
+CATCHING_COLUMNS = [
+    'match_id', 'innings_no', 'catcher', 'catcher_id',
+    'catch', 'stumped', 'runout', 'cb', 'lbw', 'bowled'
+]
+INNINGS_COLUMNS = ['match_id', 'innings_no', 'inning', 'team']
+PLAYER_COLUMNS = {
+    'batting': ['batsman_id', 'bowler_id', 'catcher_id'],
+    'bowling': ['bowler_id'],
+    'catching': ['catcher_id']
+}
+
+_indexed = {}
+_state = {'entry': None, 'checked': 0.0}
+
+
+def player_ref(record, field):
+    ''' Name and id of a nested player object, or missing values '''
+    player = record.get(field)
+    if not isinstance(player, dict):
+        return None, None
+    return player.get('name'), player.get('id')
+
+
+def flatten_scorecard(match_id, innings_list):
+    ''' Flat batting, bowling, catching and innings rows for one scorecard '''
+    rows = {'batting': [], 'bowling': [], 'catching': [], 'innings': []}
+
+    for innings_no, inn in enumerate(innings_list, start=1):
+        key = [match_id, innings_no]
+        inning = inn.get('inning', '')
+        rows['innings'].append(key + [inning, inning.replace(' Inning 1', '')])
+
+        for position, record in enumerate(inn.get('batting', []), start=1):
+            rows['batting'].append(
+                key + [position]
+                + list(player_ref(record, 'batsman'))
+                + [record.get('dismissal')]
+                + list(player_ref(record, 'bowler'))
+                + list(player_ref(record, 'catcher'))
+                + [record.get('dismissal-text')]
+                + [record.get(field, 0) for field in ('r', 'b', '4s', '6s', 'sr')]
+            )
+
+        for position, record in enumerate(inn.get('bowling', []), start=1):
+            nb, wd = record.get('nb', 0), record.get('wd', 0)
+            rows['bowling'].append(
+                key + [position]
+                + list(player_ref(record, 'bowler'))
+                + [record.get(field, 0) for field in ('o', 'm', 'r', 'w')]
+                + [nb, wd, record.get('eco', 0), nb + wd]
+            )
+
+        for record in inn.get('catching', []):
+            rows['catching'].append(
+                key
+                + list(player_ref(record, 'catcher'))
+                + [record.get(field, 0) for field in CATCHING_COLUMNS[4:]]
+            )
+
+    return rows
+
+
+def read_scorecard(path):
+    ''' Parsed innings list of one scorecard file, with orjson when installed '''
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def match_id_of(path):
+    ''' Match id of a scorecard file '''
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def flatten_file(path):
+    ''' Flat rows of one scorecard file '''
+    return flatten_scorecard(match_id_of(path), read_scorecard(path))
+
+
+def _parse_chunk(paths, parse):
+    ''' Parse a chunk of files, recording per-file errors instead of raising '''
+    results = []
+    for path in paths:
+        try:
+            results.append((path, parse(path), None))
+        except (OSError, ValueError, TypeError, AttributeError) as error:
+            results.append((path, None, f'{type(error).__name__}: {error}'))
+    return results
+
+
+def parse_files(paths, parse=read_scorecard, workers=None, chunksize=CHUNK_SIZE):
+    '''
+    Yield (path, result, error) for every file, in order. Large batches are
+    split into chunks and parsed across a process pool; `parse` must be a
+    module-level function. A file that fails to read or parse yields its
+    error and the batch goes on.
+    '''
+    paths = list(paths)
+    workers = PARSE_WORKERS if workers is None else workers
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        for chunk in chunks:
+            yield from _parse_chunk(chunk, parse)
+        return
+
+    # Spawned, not forked: the dashboard process runs server threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Keep a bounded window of chunks in flight so results stream back in order
+        window = workers * 2
+        pending = [pool.submit(_parse_chunk, chunk, parse) for chunk in chunks[:window]]
+        submitted = len(pending)
+        while pending:
+            results = pending.pop(0).result()
+            if submitted < len(chunks):
+                pending.append(pool.submit(_parse_chunk, chunks[submitted], parse))
+                submitted += 1
+            yield from results
+
+
+def _build(sources):
+    ''' Flatten every scorecard into the consolidated tables '''
+    rows = {'batting': [], 'bowling': [], 'catching': [], 'innings': []}
+    for _, flat, error in parse_files(sources, flatten_file):
+        if error is not None:
+            # Empty or truncated download; the match has no scorecard yet
+            continue
+        for table, table_rows in flat.items():
+            rows[table].extend(table_rows)
+
+    columns = {
+        'batting': BATTING_COLUMNS,
+        'bowling': BOWLING_COLUMNS,
+        'catching': CATCHING_COLUMNS,
+        'innings': INNINGS_COLUMNS
+    }
+    frames = {}
+    for table, table_columns in columns.items():
+        frame = pd.DataFrame(rows[table], columns=table_columns)
+        order = KEYS + (['position'] if 'position' in table_columns else [])
+        frames[table] = frame.sort_values(order, kind='stable').reset_index(drop=True)
+    return _encode(frames)
+
+
+def _encode(frames):
+    ''' Put player ids and team names on the shared dictionary codes '''
+    for table, columns in PLAYER_COLUMNS.items():
+        encode_columns(frames[table], columns, 'player')
+    encode_columns(frames['innings'], ['team'], 'team')
+    return frames
+
+
+def scorecard_files(directory=SCORECARD_DIR):
+    ''' Every scorecard file in the archive '''
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+
+def refresh():
+    ''' Check the archive files now, recompiling the tables if any was added or changed '''
+    entry = cached_frames('scorecards', scorecard_files(), _build)
+    _state.update(entry=entry, checked=time.monotonic())
+    return entry
+
+
+def _compiled():
+    ''' Compiled archive; the files are checked at most every REFRESH_SECONDS '''
+    entry = _state['entry']
+    if entry is None or time.monotonic() - _state['checked'] >= REFRESH_SECONDS:
+        entry = refresh()
+    return entry
+
+
+def load_tables():
+    ''' Consolidated tables indexed and sorted by (match_id, innings_no) '''
+    entry = _compiled()
+    version = (entry['version'], generation())
+    tables = _indexed.get(version)
+    if tables is None:
+        frames = _encode({table: frame.copy(deep=False) for table, frame in entry['frames'].items()})
+        tables = {
+            table: frame.set_index(KEYS, drop=False).rename_axis([f'{k}_key' for k in KEYS])
+            for table, frame in frames.items()
+        }
+        _indexed.clear()
+        _indexed[version] = tables
+    return tables
+
+
+def scorecard_version():
+    ''' Content version of the scorecard archive, as of the last check '''
+    return _compiled()['version']
+
+
+def _slice(frame, match_id, innings_no=None):
+    ''' Rows of a sorted table for a match, or one innings of it '''
+    key = match_id if innings_no is None else (match_id, innings_no)
+    try:
+        return frame.loc[[key]]
+    except KeyError:
+        return frame.iloc[0:0]
+
+
+def innings_data(match_id, innings_no):
+    ''' Team name, batting and bowling rows of one innings, from the shared dataset '''
+    from dataset import current  # pylint: disable=import-outside-toplevel
+    dataset = current()
+    innings = _slice(dataset.table('innings'), match_id, innings_no)
+    team = innings['team'].iloc[0] if len(innings) else None
+    batting = _slice(dataset.table('batting'), match_id, innings_no).reset_index(drop=True)
+    bowling = _slice(dataset.table('bowling'), match_id, innings_no).reset_index(drop=True)
+    return team, batting, bowling
+
+
+def main():
+    ''' Command line entry point: parse the archive and report per-file errors '''
+    parser = argparse.ArgumentParser(description='Parse every scorecard in the archive')
+    parser.add_argument('--directory', default=SCORECARD_DIR, help='scorecard directory')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = {'files': 0, 'batting': 0, 'bowling': 0, 'catching': 0, 'innings': 0}
+    errors = {}
+    for path, flat, error in parse_files(scorecard_files(args.directory), flatten_file, args.workers):
+        counts['files'] += 1
+        if error is not None:
+            errors[os.path.basename(path)] = error
+            continue
+        for table, table_rows in flat.items():
+            counts[table] += len(table_rows)
+    counts['seconds'] = round(time.perf_counter() - start, 3)
+    counts['parser'] = 'orjson' if orjson is not None else 'json'
+    print(json.dumps({'counts': counts, 'errors': errors}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+''' Monte Carlo Season Simulator over the Remaining Fixtures '''
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Initialization
+# Coin-flip pseudo-matches mixed into every head-to-head and venue record
+PRIOR_MATCHES = 4
+PLAYOFF_SPOTS = 4
+DEFAULT_SIMULATIONS = 200000
+# Simulations per seeded chunk; fixed, so results do not depend on the worker count
+CHUNK_SIMULATIONS = 20000
+
+
+def remaining_fixtures(season=None, current=None):
+    '''
+    League fixtures of a season not yet ended, with both teams known, from a
+    snapshot (default: the one in use). Defaults to the latest season of the
+    fixture list.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from datastore import read_table, snapshot
+    from standings import LEAGUE_MATCHES
+
+    fixtures = read_table((current or snapshot()).match_list)
+    seasons = fixtures['MatchDate'].str.slice(0, 4).astype(int)
+    season = season or (int(seasons.max()) if len(seasons) else None)
+    fixtures = fixtures[
+        (seasons == season).to_numpy()
+        & ~fixtures['MatchEnded'].astype(bool).to_numpy()
+        & (fixtures['MatchNumber'] <= LEAGUE_MATCHES).to_numpy()
+    ]
+    sides = fixtures['MatchName'].str.split(' vs ', n=1, expand=True).reindex(columns=[0, 1])
+    return pd.DataFrame({
+        'MatchID': fixtures['MatchID'].to_numpy(),
+        'MatchNumber': fixtures['MatchNumber'].to_numpy(),
+        'MatchDate': fixtures['MatchDate'].to_numpy(),
+        'Team1': sides[0].to_numpy(),
+        'Team2': sides[1].to_numpy(),
+        'MatchVenue': fixtures['MatchVenue'].to_numpy()
+    })
+
+
+def _smoothed(won, decided):
+    ''' Win rate pulled towards one half by PRIOR_MATCHES coin flips '''
+    return (won + PRIOR_MATCHES / 2) / (decided + PRIOR_MATCHES)
+
+
+def _logit(p):
+    ''' Log-odds of a probability '''
+    return np.log(p / (1 - p))
+
+
+def outcome_probabilities(fixtures, history=None):
+    '''
+    Probability that Team1 wins each fixture, and that it ends without a
+    result. The smoothed head-to-head rate is shifted, in log-odds, by how
+    much better Team1's record at the venue is than Team2's.
+    '''
+    # pylint: disable=import-outside-toplevel
+    import head_to_head
+    from match_store import load_matches
+    from venues import venue_key
+
+    history = load_matches() if history is None else history
+    history = history[history['MatchEnded'].astype(bool)]
+    team1 = fixtures['Team1'].to_numpy(dtype=object)
+    team2 = fixtures['Team2'].to_numpy(dtype=object)
+
+    # Head-to-head: wins of Team1 over Team2 among their decided meetings
+    won = head_to_head.compute_matrix(history)['won']
+    row1, row2 = won.index.get_indexer(team1), won.index.get_indexer(team2)
+    known = (row1 >= 0) & (row2 >= 0)
+    values = won.to_numpy()
+    won12 = np.where(known, values[row1, row2], 0)
+    won21 = np.where(known, values[row2, row1], 0)
+    h2h = _smoothed(won12, won12 + won21)
+
+    # Venue: each side's decided matches and wins at the fixture's ground
+    h_team1 = history['Team1'].astype(object).to_numpy()
+    h_team2 = history['Team2'].astype(object).to_numpy()
+    winner = history['matchWinner'].astype(object).to_numpy()
+    decided = (winner == h_team1) | (winner == h_team2)
+    grounds = history['MatchVenue'].map(venue_key).to_numpy(dtype=object)
+    sides = pd.DataFrame({
+        'team': np.concatenate([h_team1[decided], h_team2[decided]]),
+        'venue': np.concatenate([grounds[decided], grounds[decided]]),
+        'won': np.concatenate([winner[decided] == h_team1[decided], winner[decided] == h_team2[decided]])
+    })
+    record = sides.groupby(['team', 'venue'])['won'].agg(['sum', 'count'])
+    grounds = fixtures['MatchVenue'].map(venue_key).to_numpy(dtype=object)
+
+    def at_venue(teams):
+        rows = record.index.get_indexer(pd.MultiIndex.from_arrays([teams, grounds]))
+        wins = np.where(rows >= 0, record['sum'].to_numpy()[rows], 0)
+        played = np.where(rows >= 0, record['count'].to_numpy()[rows], 0)
+        return _smoothed(wins, played)
+
+    p_win = 1 / (1 + np.exp(-(_logit(h2h) + _logit(at_venue(team1)) - _logit(at_venue(team2)))))
+    no_result = 1 - decided.mean() if len(decided) else 0.0
+    return p_win, np.full(len(fixtures), no_result)
+
+
+def simulate_chunk(seed, simulations, setup):
+    '''
+    Play the remaining fixtures `simulations` times and count, per team, how
+    often it finished in each table position. Returns (position counts,
+    summed final points).
+    '''
+    # pylint: disable=import-outside-toplevel
+    from standings import POINTS
+
+    rng = np.random.default_rng(seed)
+    home, away = setup['home'], setup['away']
+    n_teams = len(setup['points'])
+
+    draw = rng.random((simulations, len(home)))
+    no_result = draw < setup['p_no_result']
+    home_won = ~no_result & (draw < setup['p_no_result'] + (1 - setup['p_no_result']) * setup['p_win'])
+    away_won = ~no_result & ~home_won
+
+    # Fixture outcomes -> points per team, as one matrix product per outcome
+    sides = np.eye(n_teams, dtype='float32')
+    points = (
+        setup['points']
+        + POINTS['won'] * (home_won.astype('float32') @ sides[home])
+        + POINTS['won'] * (away_won.astype('float32') @ sides[away])
+        + POINTS['no_result'] * (no_result.astype('float32') @ (sides[home] + sides[away]))
+    )
+
+    # Ties on points fall back to the current net run rate order
+    order = np.argsort(-(points + setup['tiebreak']), axis=1, kind='stable')
+    places = np.bincount((order * n_teams + np.arange(n_teams)).ravel(), minlength=n_teams * n_teams)
+    return places.reshape(n_teams, n_teams), points.sum(axis=0, dtype='float64')
+
+
+def _run_chunk(task):
+    ''' Process pool entry point '''
+    return simulate_chunk(*task)
+
+
+def simulate(simulations=DEFAULT_SIMULATIONS, seed=0, workers=None, season=None):
+    '''
+    Playoff-qualification probabilities of every team over the remaining
+    league fixtures. Standings and fixtures come from the same snapshot. Each
+    chunk of simulations has its own seed spawned from `seed`, so the same
+    seed gives the same table on any number of workers.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from datastore import snapshot
+    from match_store import refresh, snapshot_digest
+    from standings import LEAGUE_MATCHES, standings
+
+    current = snapshot()
+    fixtures = remaining_fixtures(season, current)
+    season = season or (int(fixtures['MatchDate'].iloc[0][:4]) if len(fixtures) else None)
+    table = standings(season)
+    if refresh()['snapshot'] != snapshot_digest(current):
+        raise RuntimeError(f'Snapshot {current.version} changed while the standings were read')
+    teams = pd.Index(table['Team'])
+    fixtures = fixtures[teams.get_indexer(fixtures['Team1']) >= 0]
+    fixtures = fixtures[teams.get_indexer(fixtures['Team2']) >= 0]
+
+    # A team plays every other twice or so; more than that means mixed-up data
+    remaining = np.bincount(
+        np.concatenate([teams.get_indexer(fixtures['Team1']), teams.get_indexer(fixtures['Team2'])]),
+        minlength=len(teams)
+    )
+    per_team = -(-2 * LEAGUE_MATCHES // max(len(teams), 1))
+    over = table['Played'].to_numpy() + remaining > per_team
+    if over.any():
+        raise ValueError(
+            f'Played and remaining fixtures exceed {per_team} league matches for: '
+            + ', '.join(teams[over])
+        )
+
+    p_win, p_no_result = outcome_probabilities(fixtures)
+    setup = {
+        'home': teams.get_indexer(fixtures['Team1']),
+        'away': teams.get_indexer(fixtures['Team2']),
+        'p_win': p_win,
+        'p_no_result': p_no_result,
+        'points': table['Points'].to_numpy(dtype='float32'),
+        'tiebreak': (table['NRR'].rank(method='first') / (len(table) + 1)).to_numpy(dtype='float32')
+    }
+
+    simulations = max(simulations, 1)
+    sizes = [CHUNK_SIMULATIONS] * (simulations // CHUNK_SIMULATIONS)
+    if simulations % CHUNK_SIMULATIONS:
+        sizes.append(simulations % CHUNK_SIMULATIONS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(s, n, setup) for s, n in zip(seeds, sizes)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        results = [_run_chunk(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            results = list(pool.map(_run_chunk, tasks))
+
+    places = sum(result[0] for result in results)
+    points = sum(result[1] for result in results)
+    outlook = pd.DataFrame({
+        'Team': teams,
+        'Points': table['Points'].to_numpy(),
+        'Remaining': remaining,
+        'Expected_Points': points / simulations,
+        'Top_2': places[:, :2].sum(axis=1) / simulations,
+        'Playoffs': places[:, :PLAYOFF_SPOTS].sum(axis=1) / simulations
+    })
+    outlook = outlook.sort_values(['Playoffs', 'Expected_Points'], ascending=False, kind='stable')
+    outlook.index = pd.RangeIndex(1, len(outlook) + 1, name='Pos')
+    return outlook
+
+
+def main():
+    ''' Command line entry point '''
+    parser = argparse.ArgumentParser(description=__doc__.strip(" '"))
+    parser.add_argument('--simulations', type=int, default=DEFAULT_SIMULATIONS,
+                        help=f'seasons to simulate, default {DEFAULT_SIMULATIONS}')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='simulation processes, default all cores')
+    parser.add_argument('--season', type=int, default=None, help='season, default latest')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    outlook = simulate(args.simulations, args.seed, args.workers, args.season)
+    print(outlook.round(3).to_string())
+    print(f'{args.simulations} simulations in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
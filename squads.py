@@ -0,0 +1,119 @@
+''' Squad Registry for Every Team '''
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from datastore import cached_frames, data_path
+from encoding import encode_columns, generation
+
+# Initialization
+SQUAD_DIR = data_path('squad')
+CATEGORICAL = ['team', 'role', 'country', 'style']
+# Reads reuse the loaded squads for this long before the files are globbed and checked again
+REFRESH_SECONDS = float(os.environ.get('IPL_REFRESH_SECONDS', 30))
+
+_state = {'entry': None, 'checked': 0.0}
+_squads = {}
+_registry = {}
+
+
+def _build(sources):
+    ''' Read every squad file into one frame with a team key and playing style '''
+    frames = []
+    for path in sources:
+        squad = pd.read_csv(path)
+        squad.insert(0, 'team', os.path.splitext(os.path.basename(path))[0])
+        frames.append(squad)
+    squads = pd.concat(frames, ignore_index=True)
+
+    role = squads.role.str.lower()
+    squads['style'] = np.select(
+        [
+            role == 'bowler',
+            role == 'batsman',
+            role == 'batting allrounder',
+            role == 'bowling allrounder',
+            role == 'wk-batsman'
+        ],
+
+        [
+            squads.bowlingStyle,
+            squads.battingStyle,
+            squads.battingStyle,
+            squads.bowlingStyle,
+            squads.battingStyle
+        ],
+
+        default=np.nan
+    )
+
+    for column in CATEGORICAL:
+        squads[column] = squads[column].astype('category')
+
+    squads = squads.sort_values('team', kind='stable').reset_index(drop=True)
+    return {'squads': encode_columns(squads, ['id'], 'player')}
+
+
+def squad_files(directory=SQUAD_DIR):
+    ''' Every squad file in the data directory '''
+    return sorted(glob.glob(os.path.join(directory, '*.csv')))
+
+
+def refresh():
+    ''' Check the squad files now, reloading the squads if any was added or changed '''
+    entry = cached_frames('squads', squad_files(), _build)
+    _state.update(entry=entry, checked=time.monotonic())
+    return entry
+
+
+def _loaded():
+    ''' Loaded squads; the files are checked at most every REFRESH_SECONDS '''
+    entry = _state['entry']
+    if entry is None or time.monotonic() - _state['checked'] >= REFRESH_SECONDS:
+        entry = refresh()
+    return entry
+
+
+def load_squads():
+    ''' All squads in one frame sorted by team, as read from the squad files '''
+    entry = _loaded()
+    version = (entry['version'], generation())
+    squads = _squads.get(version)
+    if squads is None:
+        squads = encode_columns(entry['frames']['squads'].copy(deep=False), ['id'], 'player')
+        _squads.clear()
+        _squads[version] = squads
+    return squads
+
+
+def _ranges():
+    ''' The shared dataset's squads and their per-team row ranges, per dataset version '''
+    from dataset import current  # pylint: disable=import-outside-toplevel
+    dataset = current()
+    registry = _registry.get(dataset.version)
+    if registry is None:
+        squads = dataset.table('squads')
+        codes = squads['team'].cat.codes.to_numpy()
+        bounds = np.searchsorted(codes, np.arange(len(squads['team'].cat.categories) + 1))
+        ranges = {
+            team: (bounds[i], bounds[i + 1])
+            for i, team in enumerate(squads['team'].cat.categories)
+        }
+        registry = (squads, ranges)
+        _registry.clear()
+        _registry[dataset.version] = registry
+    return registry
+
+
+def team_squad(name):
+    ''' Squad of one team as a slice of the shared dataset's squads, without copying rows '''
+    squads, ranges = _ranges()
+    start, stop = ranges.get(name, (0, 0))
+    return squads.iloc[start:stop]
+
+
+def squad_version():
+    ''' Content version of the squad files, as of the last check '''
+    return _loaded()['version']
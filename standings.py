@@ -0,0 +1,186 @@
+''' Points Table and Net Run Rate '''
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from match_store import batting_order, load_matches, refresh
+from players import overs_to_balls
+
+# Initialization
+# League-stage matches per season; higher match numbers are playoffs and stay off the table
+LEAGUE_MATCHES = int(os.environ.get('IPL_LEAGUE_MATCHES', 70))
+# A side bowled out is charged its full quota of overs in net run rate
+QUOTA_BALLS = 120
+ALL_OUT = 10
+POINTS = {'won': 2, 'lost': 0, 'no_result': 1}
+COUNTERS = [
+    'played', 'won', 'lost', 'no_result', 'points',
+    'runs_for', 'balls_faced', 'runs_against', 'balls_bowled'
+]
+TABLE_COLUMNS = ['Team', 'Played', 'Won', 'Lost', 'No_Result', 'Points', 'NRR']
+
+_lock = threading.Lock()
+_seasons = {}
+
+
+def balls_faced(overs, wickets):
+    ''' Balls an innings counts for in net run rate: the full quota when bowled out '''
+    balls = overs_to_balls(overs.fillna(0).to_numpy())
+    return np.where(wickets.fillna(0).to_numpy() >= ALL_OUT, QUOTA_BALLS, balls)
+
+
+def results(matches):
+    '''
+    Two rows per completed league match, one per side, with the counters it
+    adds to that side. Matches without a winner score a no result each and
+    are left out of net run rate.
+    '''
+    data = matches[matches['MatchEnded'].astype(bool) & (matches['MatchNumber'] <= LEAGUE_MATCHES)]
+    batted_first, batted_second = batting_order(data)
+
+    winner = data['matchWinner'].astype(object).to_numpy()
+    decided = (winner == batted_first) | (winner == batted_second)
+    runs1 = np.where(decided, data['r1'].fillna(0).to_numpy(), 0)
+    runs2 = np.where(decided, data['r2'].fillna(0).to_numpy(), 0)
+    balls1 = np.where(decided, balls_faced(data['o1'], data['w1']), 0)
+    balls2 = np.where(decided, balls_faced(data['o2'], data['w2']), 0)
+
+    def side(team, opponent, runs_for, balls_for, runs_against, balls_against):
+        won = decided & (winner == team)
+        lost = decided & (winner == opponent)
+        no_result = ~decided
+        return pd.DataFrame({
+            'id': data['id'].to_numpy(),
+            'date': pd.to_datetime(data['MatchDate']).to_numpy(dtype='datetime64[D]'),
+            'number': data['MatchNumber'].to_numpy(),
+            'team': team,
+            'opponent': opponent,
+            'played': 1,
+            'won': won.astype('int64'),
+            'lost': lost.astype('int64'),
+            'no_result': no_result.astype('int64'),
+            'points': POINTS['won'] * won + POINTS['lost'] * lost + POINTS['no_result'] * no_result,
+            'runs_for': runs_for.astype('int64'),
+            'balls_faced': balls_for.astype('int64'),
+            'runs_against': runs_against.astype('int64'),
+            'balls_bowled': balls_against.astype('int64')
+        })
+
+    rows = pd.concat([
+        side(batted_first, batted_second, runs1, balls1, runs2, balls2),
+        side(batted_second, batted_first, runs2, balls2, runs1, balls1)
+    ], ignore_index=True)
+    return rows.sort_values(['date', 'number'], kind='stable', ignore_index=True)
+
+
+def cumulative(rows, totals=None):
+    '''
+    Running totals per team after each of its matches, in one grouped pass,
+    continuing from earlier totals when given. Returns team -> (match days,
+    cumulative counter matrix).
+    '''
+    sums = rows.groupby('team', sort=False)[COUNTERS].cumsum().to_numpy()
+    dates = rows['date'].to_numpy()
+    totals = dict(totals or {})
+    for team, positions in rows.groupby('team', sort=True).indices.items():
+        days, values = dates[positions], sums[positions]
+        if team in totals:
+            before_days, before = totals[team]
+            days = np.concatenate([before_days, days])
+            values = np.concatenate([before, values + before[-1]])
+        totals[team] = (days, values)
+    return totals
+
+
+def _teams(matches):
+    ''' Teams of a set of matches '''
+    return set(matches['Team1'].astype(object)) | set(matches['Team2'].astype(object))
+
+
+def _season(season, dataset=None):
+    '''
+    Cumulative totals of a season, from the store or a shared dataset. Matches
+    added after the last one folded extend each team's running totals; a
+    corrected, removed or out-of-order match rebuilds the season. Other
+    seasons are left alone.
+    '''
+    with _lock:
+        manifest, load = (refresh(), load_matches) if dataset is None else (dataset.store(), dataset.matches)
+        version = manifest['partitions'].get(str(season))
+        if version is None:
+            return None
+        entry = _seasons.get(season)
+        if entry is not None and entry['version'] == version:
+            return entry
+
+        hashes = {i: h for i, (year, h) in manifest['rows'].items() if year == season}
+        matches = load([season])
+        rows = None
+        if entry is not None and entry['hashes'].keys() <= hashes.keys() \
+                and all(entry['hashes'].get(i, h) == h for i, h in hashes.items()):
+            added = matches[~matches['id'].isin(entry['hashes'])]
+            rows = results(added)
+            if len(rows) and (rows['date'].iloc[0], rows['number'].iloc[0]) < entry['last']:
+                rows = None
+        if rows is not None:
+            totals = cumulative(rows, entry['totals'])
+            teams = sorted(set(entry['teams']) | _teams(added))
+            last = entry['last']
+        else:
+            rows = results(matches)
+            totals = cumulative(rows)
+            teams = sorted(_teams(matches))
+            last = (np.datetime64('NaT'), 0)
+        if len(rows):
+            last = (rows['date'].iloc[-1], rows['number'].iloc[-1])
+
+        entry = {'version': version, 'hashes': hashes, 'teams': teams, 'totals': totals, 'last': last}
+        _seasons[season] = entry
+        return entry
+
+
+def _rate(runs, balls):
+    ''' Runs per over, zero before any ball '''
+    return np.divide(runs * 6.0, balls, out=np.zeros(len(runs)), where=balls > 0)
+
+
+def standings(season=None, as_of=None, dataset=None):
+    '''
+    Points table of a season, as it stood at the end of `as_of` (a date) when
+    given, read from the store or from a shared dataset. Teams are ranked on
+    points, then net run rate.
+    '''
+    if as_of is not None:
+        as_of = np.datetime64(pd.Timestamp(as_of).date(), 'D')
+    if season is None:
+        manifest = refresh() if dataset is None else dataset.store()
+        seasons = sorted(int(s) for s in manifest['partitions'])
+        season = int(str(as_of)[:4]) if as_of is not None else (seasons[-1] if seasons else None)
+    entry = _season(season, dataset) if season is not None else None
+    if entry is None:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+
+    counters = np.zeros((len(entry['teams']), len(COUNTERS)), dtype='int64')
+    for row, team in enumerate(entry['teams']):
+        if team not in entry['totals']:
+            continue
+        days, totals = entry['totals'][team]
+        last = len(days) if as_of is None else np.searchsorted(days, as_of, side='right')
+        if last:
+            counters[row] = totals[last - 1]
+
+    values = dict(zip(COUNTERS, counters.T))
+    table = pd.DataFrame({
+        'Team': entry['teams'],
+        'Played': values['played'],
+        'Won': values['won'],
+        'Lost': values['lost'],
+        'No_Result': values['no_result'],
+        'Points': values['points'],
+        'NRR': _rate(values['runs_for'], values['balls_faced'])
+        - _rate(values['runs_against'], values['balls_bowled'])
+    })
+    table = table.sort_values(['Points', 'NRR', 'Team'], ascending=[False, False, True], kind='stable')
+    table.index = pd.RangeIndex(1, len(table) + 1, name='Pos')
+    return table
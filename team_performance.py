@@ -4,44 +4,72 @@ import plotly.graph_objects as go
 import plotly.colors as pc
 import pandas as pd
 import numpy as np
+from dataset import current
+from squads import team_squad
+from figure_cache import cached_figure
+from render_policy import limit_categories
+from venues import summarize
 
 # Initilization
 shared_color=pc.sequential.Mint
 
 # Data Ingestion
-df1 = pd.read_csv("./data/match_info-10jun25.csv")
-df2 = pd.read_csv("./data/match_list-9jun25.csv")
-df = pd.merge(df1, df2, left_on='id', right_on='MatchID', how='inner')
-df['Cities'] = df.MatchVenue.str.split(',', n=1, expand=True)[1]
+_team_index = {}
+
+def team_scope(team_name, dataframe=None):
+    ''' Store revision at which a team's matches last changed, in the shared dataset '''
+    return current().scope(f"team:{team_name.replace('_', ' ')}")
+
+def squad_scope(team_name):
+    ''' Version of the squads in the shared dataset '''
+    return current().scope('squads')
+
+def team_index():
+    ''' Shared match frame with Cities, and team -> row positions, per dataset version '''
+    dataset = current()
+    version = dataset.version
+    index = _team_index.get(version)
+    if index is None:
+        data = dataset.table('matches')
+
+        # Group match rows by the shared team codes rather than by name strings
+        rows = np.arange(len(data))
+        sides = np.concatenate([data.Team1.cat.codes.to_numpy(), data.Team2.cat.codes.to_numpy()])
+        order = np.concatenate([rows, rows])
+        names = data.Team1.cat.categories
+        positions = {
+            names[code]: np.sort(order[idx])
+            for code, idx in pd.Series(sides).groupby(sides).indices.items()
+            if code >= 0
+        }
+
+        index = (data, positions)
+        _team_index.clear()
+        _team_index[version] = index
+    return index
+
+def team_matches(team_name, dataframe=None):
+    ''' Matches played by a team, read from the team index '''
+    team_name = team_name.replace('_', ' ')
+    if dataframe is not None:
+        data = dataframe.loc[(dataframe.Team1==team_name) | (dataframe.Team2==team_name)]
+        if 'Cities' not in data:
+            data = data.assign(Cities=data.MatchVenue.str.split(',', n=1, expand=True)[1])
+        return data
+
+    data, positions = team_index()
+    return data.iloc[positions.get(team_name, np.empty(0, dtype=int))]
 
 def fetch_team(name):
-    ''' Fetching team data for files '''
-    team = pd.read_csv(f'./data/squad/{name}.csv')
-    team['style'] = np.select(
-        [
-            team.role.str.lower() == 'bowler',
-            team.role.str.lower() == 'batsman',
-            team.role.str.lower() == 'batting allrounder',
-            team.role.str.lower() == 'bowling allrounder',
-            team.role.str.lower() == 'wk-batsman'
-        ],
-
-        [
-            team.bowlingStyle,
-            team.battingStyle,
-            team.battingStyle,
-            team.bowlingStyle,
-            team.battingStyle
-        ],
-
-        default=np.nan
-    )
-    return team
+    ''' Fetching team data from the squad registry '''
+    return team_squad(name)
 
 # Visulizations
+@cached_figure(scope=squad_scope)
 def sunburst(team_name):
     ''' Sunburst Chart for Team Players Distribution '''
-    data = fetch_team(team_name)
+    data = fetch_team(team_name)[['role', 'style', 'name']].astype(object)
+    data['style'] = data['style'].fillna('Unknown')
     fig = px.sunburst(
         data,
         path = ['role', 'style', 'name'],
@@ -58,22 +86,24 @@ def sunburst(team_name):
 
     return fig
 
-def match_count(team_name, dataframe=df):
+@cached_figure(scope=team_scope)
+def match_count(team_name, dataframe=None):
     ''' Match Count and Average Runs by City '''
-    # Venue average score (line)
-    team_name = team_name.replace('_', ' ')
-    data = dataframe.loc[(dataframe.Team1==team_name) | (dataframe.Team2==team_name)]
-    data['Cities'] = data.MatchVenue.str.split(',', n=1, expand=True)[1]
-
-    venue_score = data.groupby('Cities')[['r1','r2']].mean().max(axis=1).reset_index()
-    venue_score = venue_score.rename(columns={0: 'Avg_Runs'})
-
-    # Match count per city (bar)
-    count = data.groupby('Cities')[['MatchName']].count().reset_index()
-    count = count.rename(columns={'MatchName': 'Match_Count'})
-
-    # Merge both on 'Cities'
-    combined = pd.merge(count, venue_score, on='Cities')
+    # Match count (bar) and average innings score (line) per city, from the venue dimension
+    data = team_matches(team_name, dataframe)
+    stats = summarize(data, by='city')
+
+    combined = pd.DataFrame({
+        'Cities': stats['City'].to_numpy(),
+        'Match_Count': stats['matches'].to_numpy(),
+        'Avg_Runs': stats['avg_score'].to_numpy(),
+        'Runs': stats['runs'].to_numpy(),
+        'Innings': stats['innings'].to_numpy()
+    })
+    combined = limit_categories(
+        combined, 'Cities', 'Match_Count', {'Match_Count': 'sum', 'Runs': 'sum', 'Innings': 'sum'},
+        rates={'Avg_Runs': ('Runs', 'Innings', 1)}
+    )
 
     fig = go.Figure()
 
@@ -116,11 +146,11 @@ def overseas_players(team_name):
     players.attrs["title"] = f"Overseas Players of {team_name}"
     return players
 
-def performance (team_name,dataframe=df):
+@cached_figure(scope=team_scope)
+def performance (team_name,dataframe=None):
     ''' Matches Played vs Won by City '''
+    data = team_matches(team_name, dataframe)
     team_name = team_name.replace('_', ' ')
-    data = dataframe.loc[(dataframe.Team1==team_name) | (dataframe.Team2==team_name)]
-    data['Cities'] = data.MatchVenue.str.split(',', n=1, expand=True)[1]
 
     matches_won=data.loc[(data.matchWinner==team_name)]
 
@@ -131,6 +161,7 @@ def performance (team_name,dataframe=df):
 
     # Replace NaN with 0 for plotting
     combined1['Won'] = combined1['Won'].fillna(0)
+    combined1 = limit_categories(combined1, 'Cities', 'Played', {'Won': 'sum', 'Played': 'sum'})
 
     # Create the plot
     fig = go.Figure()
@@ -171,13 +202,13 @@ def performance (team_name,dataframe=df):
 
     return fig
 
-def toss_performance(team_name, dataframe=df):
+@cached_figure(scope=team_scope)
+def toss_performance(team_name, dataframe=None):
     ''' Toss Win Percentage '''
+    data = team_matches(team_name, dataframe)
     team_name = team_name.replace('_', ' ')
-    data = dataframe.loc[(dataframe.Team1==team_name) | (dataframe.Team2==team_name)]
-    data['Cities'] = data.MatchVenue.str.split(',', n=1, expand=True)[1]
 
-    tosses = data[(data['Team1'] == team_name) | (data['Team2'] == team_name)]
+    tosses = data
 
     # Tosses won by RCB
     toss_wins = tosses[tosses['tossWinner'] == team_name]
@@ -207,13 +238,13 @@ def toss_performance(team_name, dataframe=df):
 
     return fig
 
-def toss_choice(team_name,dataframe=df):
+@cached_figure(scope=team_scope)
+def toss_choice(team_name,dataframe=None):
     ''' Toss Choice Analysis (Bat vs Bowl) '''
+    data = team_matches(team_name, dataframe)
     team_name = team_name.replace('_', ' ')
-    data = dataframe.loc[(dataframe.Team1==team_name) | (dataframe.Team2==team_name)]
-    data['Cities'] = data.MatchVenue.str.split(',', n=1, expand=True)[1]
 
-    tosses = data[(data['Team1'] == team_name) | (data['Team2'] == team_name)]
+    tosses = data
 
     # Tosses won by RCB
     toss_wins = tosses[tosses['tossWinner'] == team_name]
@@ -0,0 +1,106 @@
+''' Incremental Updates Agree with a Fresh Build of the Same Data '''
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+# Initialization
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DATA = os.path.join(ROOT, 'data')
+OLD, NEW = '4may25', 'latest'
+
+# Runs the steps in one interpreter, so venue and standings state carries across them.
+# Each step copies its scorecards in, switches the snapshot and records every result.
+WORKER = '''
+import json, os, pickle, shutil, sys, warnings
+warnings.simplefilter('ignore')
+import pandas as pd
+import datastore, match_store, players, standings, venues
+
+def plain(frame):
+    frame = frame.copy()
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+    return frame
+
+results = []
+for step in json.loads(sys.argv[2]):
+    for name in step['scorecards']:
+        shutil.copy(os.path.join(sys.argv[3], name), datastore.data_path('scorecard', name))
+    datastore.DATA_VERSION = step['version']
+    match_store.ingest(datastore.snapshot())
+    results.append({
+        'matches': plain(match_store.load_matches()).sort_values('id', ignore_index=True),
+        'venues': plain(venues.venue_stats()),
+        'cities': plain(venues.city_stats()),
+        'standings': {season: standings.standings(season) for season in match_store.seasons()},
+        'players': plain(players.totals()).sort_values(['player_id', 'season'], ignore_index=True)
+    })
+with open(sys.argv[1], 'wb') as f:
+    pickle.dump(results, f)
+'''
+
+
+def make_data_dir(path):
+    ''' Data directory with both shipped snapshots, the squads and no scorecards yet '''
+    shutil.copytree(SOURCE_DATA, path, ignore=shutil.ignore_patterns('.cache', 'scorecard'))
+    os.makedirs(os.path.join(path, 'scorecard'))
+    return path
+
+
+def run_steps(data_dir, steps, output):
+    ''' Run the steps in a fresh interpreter against a data directory and load its results '''
+    env = dict(os.environ, IPL_DATA_DIR=str(data_dir), PYTHONPATH=ROOT)
+    subprocess.run(
+        [sys.executable, '-c', WORKER, str(output), json.dumps(steps),
+         os.path.join(SOURCE_DATA, 'scorecard')],
+        env=env, cwd=str(output.parent), check=True, capture_output=True, text=True
+    )
+    with open(output, 'rb') as f:
+        return pickle.load(f)
+
+
+def assert_same(incremental, fresh):
+    ''' Every table of an incremental step equals the fresh build's '''
+    for name in ('matches', 'venues', 'cities', 'players'):
+        pd.testing.assert_frame_equal(incremental[name], fresh[name], check_dtype=False, obj=name)
+    assert incremental['standings'].keys() == fresh['standings'].keys()
+    for season, table in incremental['standings'].items():
+        pd.testing.assert_frame_equal(table, fresh['standings'][season], obj=f'standings {season}')
+
+
+@pytest.fixture(scope='module')
+def steps():
+    ''' Older snapshot with the scorecards of its matches, then the newer one with the rest '''
+    old_ids = set(pd.read_csv(os.path.join(SOURCE_DATA, f'match_info-{OLD}.csv'))['id'])
+    names = sorted(os.listdir(os.path.join(SOURCE_DATA, 'scorecard')))
+    first = [name for name in names if os.path.splitext(name)[0] in old_ids]
+    rest = [name for name in names if name not in first]
+    assert first and rest
+    return [
+        {'version': OLD, 'scorecards': first},
+        {'version': NEW, 'scorecards': rest},
+        {'version': OLD, 'scorecards': []}
+    ]
+
+
+def test_incremental_matches_fresh_build(tmp_path, steps):
+    ''' Adding, changing and removing matches step by step ends where a fresh build does '''
+    incremental = run_steps(make_data_dir(tmp_path / 'incremental'), steps, tmp_path / 'incremental.pkl')
+    assert len(incremental[1]['matches']) > len(incremental[0]['matches'])
+
+    for number, step in enumerate(steps):
+        # A fresh directory holding the same files as the incremental one after this step
+        copied = [name for earlier in steps[:number + 1] for name in earlier['scorecards']]
+        fresh = run_steps(
+            make_data_dir(tmp_path / f'fresh{number}'),
+            [{'version': step['version'], 'scorecards': copied}],
+            tmp_path / f'fresh{number}.pkl'
+        )
+        assert_same(incremental[number], fresh[0])
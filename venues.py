@@ -0,0 +1,255 @@
+''' Venue Dimension and Per-Venue Match Statistics '''
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+from match_store import batting_order, load_matches, refresh
+
+# Initialization
+# Former city names folded onto the current ones in lookup keys
+CITY_ALIASES = {'bangalore': 'bengaluru', 'bombay': 'mumbai', 'calcutta': 'kolkata', 'madras': 'chennai'}
+SUMS = [
+    'matches', 'first_innings', 'first_runs', 'second_innings', 'second_runs',
+    'decided', 'chases_won', 'toss_bat', 'toss_bowl'
+]
+MAXES = ['first_max', 'second_max']
+AGGREGATIONS = {
+    'Stadium': 'first', 'City': 'first',
+    **{column: 'sum' for column in SUMS}, **{column: 'max' for column in MAXES}
+}
+
+_lock = threading.Lock()
+_keys = {}
+_state = {'version': None, 'rows': {}, 'venue_of': {}, 'totals': None, 'venues': {}, 'cities': {}}
+_tables = {}
+
+
+def normalize(name):
+    ''' Lookup key of a stadium or city name: case, punctuation and spacing dropped '''
+    if not isinstance(name, str):
+        return None
+    key = re.sub(r'[^0-9a-z]+', '', name.casefold())
+    return CITY_ALIASES.get(key, key) or None
+
+
+def split_venue(venue):
+    ''' Stadium and city of a "Stadium, City" venue; the city is None when absent '''
+    if not isinstance(venue, str):
+        return None, None
+    stadium, _, city = venue.partition(',')
+    return stadium.strip(), city.strip() or None
+
+
+def venue_key(venue):
+    ''' Venue key of a raw MatchVenue: the normalized stadium, so "X" and "X, City" agree '''
+    if venue not in _keys:
+        _keys[venue] = normalize(split_venue(venue)[0])
+    return _keys[venue]
+
+
+def at_venue(venue, name):
+    '''
+    Whether a raw MatchVenue is the venue `name` (stadium or "Stadium, City"),
+    or lies in the city `name` (the whole city or one of its comma-separated parts)
+    '''
+    key = normalize(name)
+    if key is None:
+        return False
+    if venue_key(venue) == normalize(split_venue(name)[0]):
+        return True
+    city = split_venue(venue)[1]
+    return city is not None and key in {normalize(part) for part in [city] + city.split(',')}
+
+
+def contributions(matches):
+    ''' One row per match with its venue key and the counters it adds to that venue '''
+    venues = matches['MatchVenue'].astype(object)
+    uniques = venues.dropna().unique()
+    split = {venue: split_venue(venue) for venue in uniques}
+
+    # Innings of matches without a result stay out of the averages and the chase rate
+    winner = matches['matchWinner'].astype(object).to_numpy()
+    _, chasing = batting_order(matches)
+    decided = pd.Series(
+        (winner == matches['Team1'].astype(object).to_numpy())
+        | (winner == matches['Team2'].astype(object).to_numpy()),
+        index=matches.index
+    )
+    r1 = matches['r1'].astype('float64').where(decided)
+    r2 = matches['r2'].astype('float64').where(decided)
+    toss = matches['tossChoice'].astype(object)
+
+    return pd.DataFrame({
+        'id': matches['id'].to_numpy(),
+        'venue': venues.map({venue: venue_key(venue) for venue in uniques}).to_numpy(),
+        'Stadium': venues.map({venue: parts[0] for venue, parts in split.items()}).to_numpy(),
+        'City': venues.map({venue: parts[1] for venue, parts in split.items()}).to_numpy(),
+        'matches': 1,
+        'first_innings': r1.notna().astype('int64').to_numpy(),
+        'first_runs': r1.fillna(0).to_numpy(),
+        'first_max': r1.to_numpy(),
+        'second_innings': r2.notna().astype('int64').to_numpy(),
+        'second_runs': r2.fillna(0).to_numpy(),
+        'second_max': r2.to_numpy(),
+        'decided': decided.astype('int64').to_numpy(),
+        'chases_won': (decided.to_numpy() & (winner == chasing)).astype('int64'),
+        'toss_bat': (toss == 'bat').astype('int64').to_numpy(),
+        'toss_bowl': (toss == 'bowl').astype('int64').to_numpy()
+    })
+
+
+def fold(totals, parts):
+    ''' Running per-venue totals with more match contributions added '''
+    parts = parts[parts['venue'].notna()].set_index('venue')[list(AGGREGATIONS)]
+    if totals is not None and len(totals):
+        parts = pd.concat([totals, parts])
+    return parts.groupby(level=0, sort=True).agg(AGGREGATIONS).rename_axis('venue')
+
+
+def _ratio(numerator, denominator):
+    ''' Elementwise ratio, NaN where the denominator is zero '''
+    return numerator / denominator.where(denominator > 0)
+
+
+def derive(totals, by='venue'):
+    '''
+    Statistics table from running totals: per venue, or per city with the
+    venues of a city combined. Averages and the chase rate are recomputed from
+    the sums, so they stay exact after incremental updates.
+    '''
+    if by == 'city':
+        totals = totals.assign(city=totals['City'].map(normalize))
+        totals = totals[totals['city'].notna()]
+        totals = totals.groupby('city', sort=True).agg(
+            {'City': 'first', **{c: h for c, h in AGGREGATIONS.items() if c not in ('Stadium', 'City')}}
+        )
+        stats = totals[['City']].copy()
+    else:
+        stats = totals[['Stadium', 'City']].copy()
+        stats.insert(0, 'Venue', np.where(
+            totals['City'].notna(), totals['Stadium'] + ', ' + totals['City'].fillna(''), totals['Stadium']
+        ))
+
+    stats['matches'] = totals['matches']
+    stats['first_avg'] = _ratio(totals['first_runs'], totals['first_innings'])
+    stats['first_max'] = totals['first_max']
+    stats['second_avg'] = _ratio(totals['second_runs'], totals['second_innings'])
+    stats['second_max'] = totals['second_max']
+    stats['runs'] = totals['first_runs'] + totals['second_runs']
+    stats['innings'] = totals['first_innings'] + totals['second_innings']
+    stats['avg_score'] = _ratio(stats['runs'], stats['innings'])
+    stats['chases_won'] = totals['chases_won']
+    stats['decided'] = totals['decided']
+    stats['chase_success'] = _ratio(totals['chases_won'], totals['decided'])
+    stats['toss_bat'] = totals['toss_bat']
+    stats['toss_bowl'] = totals['toss_bowl']
+    return stats
+
+
+def summarize(matches, by='venue'):
+    ''' Venue or city statistics of any set of matches, e.g. one team's '''
+    return derive(fold(None, contributions(matches)), by)
+
+
+def _register(parts):
+    ''' Add the raw venue and city spellings of new matches to the lookup dicts '''
+    venues, cities = _state['venues'], _state['cities']
+    totals = _state['totals']
+    for key, stadium, city in parts[['venue', 'Stadium', 'City']].drop_duplicates().itertuples(index=False):
+        if pd.isna(key):
+            continue
+        venues[key] = key
+        if pd.isna(city):
+            continue
+        venues[normalize(f'{stadium}, {city}')] = key
+        canonical = normalize(totals.at[key, 'City'])
+        if canonical is None:
+            continue
+        cities[normalize(city)] = canonical
+        for part in city.split(','):
+            cities.setdefault(normalize(part), canonical)
+
+
+def update(dataset=None):
+    '''
+    Bring the venue totals up to the match store, or to the matches of a
+    shared dataset when given. New matches are folded in; a corrected or
+    removed match has its venue (old and new) recomputed from scratch.
+    Returns the store revision the totals reflect.
+    '''
+    with _lock:
+        manifest, matches = (refresh(), load_matches) if dataset is None else (dataset.store(), dataset.matches)
+        if _state['version'] == manifest['version']:
+            return _state['version']
+
+        folded, rows = _state['rows'], manifest['rows']
+        new = {i for i in rows if i not in folded}
+        changed = {i for i in rows if i in folded and folded[i] != rows[i][1]}
+        removed = {i for i in folded if i not in rows}
+        totals = _state['totals']
+
+        if changed or removed:
+            parts = contributions(matches())
+            stale = {_state['venue_of'][i] for i in changed | removed}
+            stale |= set(parts.loc[parts['id'].isin(changed), 'venue'])
+            totals = totals.drop(index=list(stale), errors='ignore')
+            parts = parts[parts['id'].isin(new) | parts['venue'].isin(stale)]
+        elif new:
+            parts = contributions(matches({rows[i][0] for i in new}))
+            parts = parts[parts['id'].isin(new)]
+        else:
+            parts = None
+
+        if parts is not None:
+            _state['totals'] = fold(totals, parts)
+            _register(parts)
+            _state['venue_of'].update(zip(parts['id'], parts['venue']))
+            for match_id in new | changed:
+                folded[match_id] = rows[match_id][1]
+            for match_id in removed:
+                del folded[match_id]
+                del _state['venue_of'][match_id]
+        _state['version'] = manifest['version']
+        return _state['version']
+
+
+def _table(by, dataset=None):
+    ''' Derived venue or city table and its rows as dicts, memoized per store revision '''
+    version = update(dataset)
+    key = (by, version)
+    table = _tables.get(key)
+    if table is None:
+        totals = _state['totals']
+        if totals is None:
+            totals = pd.DataFrame(columns=list(AGGREGATIONS)).rename_axis('venue')
+        stats = derive(totals, by)
+        table = (stats, stats.to_dict('index'))
+        for stale in [k for k in list(_tables) if k[0] == by]:
+            _tables.pop(stale, None)
+        _tables[key] = table
+    return table
+
+
+def venue_stats(dataset=None):
+    ''' Statistics of every venue, indexed by venue key, from the store or a shared dataset '''
+    return _table('venue', dataset)[0]
+
+
+def city_stats(dataset=None):
+    ''' Statistics of every city, venues combined, indexed by city key '''
+    return _table('city', dataset)[0]
+
+
+def venue(name, dataset=None):
+    ''' Statistics of one venue by stadium or full "Stadium, City" name, or None '''
+    records = _table('venue', dataset)[1]
+    venues = _state['venues']
+    key = venues.get(normalize(name)) or venues.get(normalize(split_venue(name)[0]))
+    return records.get(key)
+
+
+def city(name, dataset=None):
+    ''' Statistics of one city, venues combined, or None '''
+    records = _table('city', dataset)[1]
+    return records.get(_state['cities'].get(normalize(name)))